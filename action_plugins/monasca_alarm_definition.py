@@ -0,0 +1,134 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# (C) Copyright 2020 StackHPC Ltd.
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+DOCUMENTATION = '''
+---
+action: monasca_alarm_definition
+short_description: Optionally run monasca_alarm_definition on the controller with a reused client
+description:
+    - "Without I(controller_client) the monasca_alarm_definition module runs on the target as usual."
+    - "With I(controller_client=true) the module runs inside the controller's Ansible worker process instead.
+       The Monasca client, its Keystone session and an index of the existing alarm definitions are built for the
+       first item of a loop and reused by every following item with the same connection params, so each item
+       costs one in-memory lookup plus any change it makes."
+    - "Requires python-monascaclient and keystoneauth1 in the controller's Python, and ansible-core 2.11 or later."
+options:
+    controller_client:
+        default: false
+        type: bool
+        description:
+            - Whether to run on the controller, reusing one client for all items of a loop.
+'''
+
+import hashlib
+import importlib.util
+import json
+import os
+import sys
+
+from ansible.module_utils.basic import remove_values
+from ansible.module_utils.common.arg_spec import ArgumentSpecValidator
+from ansible.module_utils.parsing.convert_bool import boolean
+from ansible.plugins.action import ActionBase
+
+ROLE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Clients built on the controller, keyed by a digest of their connection params. Ansible runs every item of a
+# loop in the same worker process, so the items after the first reuse the client built for the first.
+_CLIENTS = {}
+
+
+class _ModuleExit(Exception):
+    def __init__(self, result):
+        super(_ModuleExit, self).__init__(result.get('msg'))
+        self.result = result
+
+
+class _ControllerModule(object):
+    """ The parts of AnsibleModule used by MonascaAnsible, for running the module on the controller
+    """
+    def __init__(self, params, check_mode, no_log_values):
+        self.params = params
+        self.check_mode = check_mode
+        self.no_log_values = no_log_values
+
+    def exit_json(self, **kwargs):
+        raise _ModuleExit(remove_values(kwargs, self.no_log_values))
+
+    def fail_json(self, msg, **kwargs):
+        kwargs.update(failed=True, msg=msg)
+        raise _ModuleExit(remove_values(kwargs, self.no_log_values))
+
+
+def _load(name, path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def _library():
+    """ Import the role's monasca module_utils and monasca_alarm_definition module into the controller
+    """
+    if 'ansible.module_utils.monasca_expression' not in sys.modules:
+        _load('ansible.module_utils.monasca_expression', os.path.join(ROLE_DIR, 'module_utils',
+                                                                      'monasca_expression.py'))
+    if 'ansible.module_utils.monasca_rest' not in sys.modules:
+        try:
+            _load('ansible.module_utils.monasca_rest', os.path.join(ROLE_DIR, 'module_utils', 'monasca_rest.py'))
+        except ImportError:
+            # Only needed for http_client=requests, which then fails to import it
+            sys.modules.pop('ansible.module_utils.monasca_rest', None)
+    if 'ansible.module_utils.monasca' not in sys.modules:
+        _load('ansible.module_utils.monasca', os.path.join(ROLE_DIR, 'module_utils', 'monasca.py'))
+    if 'monasca_alarm_definition' not in sys.modules:
+        _load('monasca_alarm_definition', os.path.join(ROLE_DIR, 'library', 'monasca_alarm_definition.py'))
+    return sys.modules['ansible.module_utils.monasca'], sys.modules['monasca_alarm_definition']
+
+
+class ActionModule(ActionBase):
+
+    def run(self, tmp=None, task_vars=None):
+        result = super(ActionModule, self).run(tmp, task_vars)
+        del tmp  # tmp no longer has any effect
+
+        module_args = self._task.args.copy()
+        if not boolean(module_args.pop('controller_client', False), strict=False):
+            result.update(self._execute_module(module_name='monasca_alarm_definition', module_args=module_args,
+                                               task_vars=task_vars))
+            return result
+
+        monasca, library = _library()
+        arg_spec = library.definition_argument_spec()
+        validation = ArgumentSpecValidator(arg_spec, mutually_exclusive=monasca.mutually_exclusive()) \
+            .validate(module_args)
+        if validation.error_messages:
+            result.update(failed=True, msg='; '.join(validation.error_messages))
+            return result
+        params = validation.validated_parameters
+        no_log_values = set(params[name] for name, spec in arg_spec.items() if spec.get('no_log') and params[name])
+        module = _ControllerModule(params, self._task.check_mode, no_log_values)
+
+        connection = [params[name] for name in sorted(monasca.argument_spec())]
+        key = hashlib.sha256(json.dumps(connection).encode('utf-8')).hexdigest()
+        try:
+            library.check_expression(module)
+            client = _CLIENTS.get(key)
+            if client is None:
+                client = library.MonascaDefinition(module)
+                client.definitions = client._index('/alarm-definitions', monasca.definition_fingerprint)
+                _CLIENTS[key] = client
+            else:
+                client._rebind(module)
+            client.run()
+        except _ModuleExit as e:
+            result.update(e.result)
+        except Exception as e:
+            result.update(failed=True, msg=remove_values(str(e), no_log_values))
+        return result
@@ -9,10 +9,44 @@ class ModuleDocFragment(object):
 
     DOCUMENTATION = r'''
 options:
+    api_retries:
+        default: 5
+        description:
+            - The number of times to retry a request which the Monasca or Keystone API throttles with a 429 or 503
+              response. The number of retries and the seconds spent waiting are returned as C(api_retries) and
+              C(api_throttled_seconds).
     api_version:
         default: '2_0'
         description:
             - The monasca api version.
+    cache_dir:
+        description:
+            - Directory in which to cache the Keystone token and service catalog between module invocations.
+              Caching is disabled unless this is set. Cached tokens are reused until they expire.
+            - M(monasca_alarm_definitions) and M(monasca_notification_methods) also journal the changes they plan
+              and apply here. A run with the same params after one which was interrupted, or failed to apply some
+              changes, within a day resumes its plan instead of listing the collection again, checking only the
+              changes which were in progress. Whether a run resumed is returned as C(journal_resumed).
+    endpoint_cache_ttl:
+        default: 3600
+        description:
+            - Seconds for which a discovered I(monasca_api_url) is cached in I(cache_dir). Set to 0 to always
+              discover the endpoint. Whether the cache was hit is returned as C(endpoint_cache_hit).
+    http_client:
+        default: monascaclient
+        choices: [ monascaclient, requests ]
+        description:
+            - The client used to call the Keystone and Monasca APIs. C(monascaclient) uses python-monascaclient and
+              keystoneauth1. C(requests) uses a minimal built in client which only needs the requests library and
+              starts several times faster, as python-monascaclient takes most of the startup time of a module.
+              Both share the token cache in I(cache_dir). C(requests) appends I(api_version) to a catalog endpoint
+              which does not end with a version, where keystoneauth1 finds it through version discovery.
+    http_pool_size:
+        description:
+            - The number of persistent connections kept open to each of the Keystone and Monasca APIs, which are
+              reused for every request. Defaults to I(max_workers), so that every concurrent request has its own
+              connection and none is opened and closed for each write. Responses are requested gzip compressed,
+              which reduces the size of large listings when the API or a proxy in front of it compresses them.
     keystone_password:
         description:
             - Keystone password to use for authentication, required unless a I(keystone_token) is specified.
@@ -32,6 +66,11 @@ options:
         required: true
         description:
             - Keystone project name to obtain a token for.
+    max_workers:
+        default: 4
+        description:
+            - The maximum number of concurrent requests made to the Monasca API when applying changes to many
+              entries at once.
     monasca_api_url:
         description:
             - Service endpoint for the monasca api.
@@ -52,4 +91,29 @@ options:
         default: ['admin', 'internal']
         description:
             - The monasca api interface. Used to discover the endpoint if I(monasca_api_url) is not provided.
+    notification_cache_ttl:
+        default: 300
+        description:
+            - Seconds for which the notification method ids, used to resolve notification method names given as
+              alarm actions, are cached in I(cache_dir). Set to 0 to list the notification methods every time.
+    page_size:
+        description:
+            - The number of entries to request per page when listing alarm definitions or notification methods.
+              Defaults to the page size of the Monasca API.
+    snapshot_refresh:
+        default: false
+        type: bool
+        description:
+            - List the alarm definitions or notification methods instead of using the snapshot in I(cache_dir), and
+              save a new snapshot.
+    snapshot_ttl:
+        default: 0
+        description:
+            - Seconds for which an index of the names, ids and fingerprints of the alarm definitions or notification
+              methods is kept in I(cache_dir) after listing them. While it is fresh, and a one entry listing sorted
+              by C(updated_at) shows the most recently updated entry is unchanged, check mode and runs which change
+              nothing use the snapshot instead of listing the collection. Runs which make changes list the
+              collection before applying them and then discard the snapshot. Set to 0 to always list the collection.
+            - Deletions made outside of these modules are not detected until the snapshot expires.
+              Whether the snapshot was used is returned as C(snapshot_hit).
 '''
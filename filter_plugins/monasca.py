@@ -0,0 +1,58 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# (C) Copyright 2020 StackHPC Ltd.
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import copy
+
+from ansible.errors import AnsibleFilterError
+
+# The defaults monasca_alarm_definitions applies to the fields of each alarm definition
+DEFINITION_DEFAULTS = (('description', ''), ('match_by', ['hostname']), ('severity', 'LOW'))
+
+
+def monasca_alarm_catalog(groups, skip_tasks=None, run_tags=None, skip_tags=None, role_tags=None):
+    """ Return the alarm definitions of every enabled group merged into one list for monasca_alarm_definitions
+        groups is a list of dicts with the name of the group as used in skip_tasks, the tag which selects it and its
+        definitions. run_tags (ansible_run_tags) selects every group when it is empty or includes all or one of
+        role_tags, the tags given to the role, and otherwise only the groups whose tags it includes. A group is
+        skipped when its name is in skip_tasks or its tag is in skip_tags (ansible_skip_tags). Missing fields are
+        given the module's defaults, severity is upper cased and a name defined by more than one group is an error.
+    """
+    skip_tasks = set(skip_tasks or [])
+    run_tags = set(run_tags or ['all'])
+    skip_tags = set(skip_tags or [])
+    select_all = bool(run_tags & set(['all'] + list(role_tags or [])))
+
+    catalog = []
+    owners = {}
+    for group in groups:
+        if group['name'] in skip_tasks or group.get('tag') in skip_tags or \
+                not (select_all or group.get('tag') in run_tags):
+            continue
+        # An empty custom_alarms may be given as a dict
+        for item in group.get('definitions') or []:
+            if not isinstance(item, dict) or not item.get('name'):
+                raise AnsibleFilterError('Alarm definition without a name in group {}: {!r}'.format(
+                    group['name'], item))
+            name = item['name']
+            if name in owners:
+                raise AnsibleFilterError('Duplicate alarm definition name {!r} in groups {} and {}'.format(
+                    name, owners[name], group['name']))
+            owners[name] = group['name']
+
+            definition = dict(item)
+            for field, default in DEFINITION_DEFAULTS:
+                if definition.get(field) is None:
+                    definition[field] = copy.copy(default)
+            definition['severity'] = definition['severity'].upper()
+            catalog.append(definition)
+    return catalog
+
+
+class FilterModule(object):
+    def filters(self):
+        return {'monasca_alarm_catalog': monasca_alarm_catalog}
@@ -26,13 +26,15 @@ requirements: [ python-monascaclient , keystoneauth1 ]
 options:
     alarm_actions:
         description:
-            -  Array of notification method IDs that are invoked for the transition to the ALARM state.
+            -  Array of notification method IDs or names that are invoked for the transition to the ALARM state.
     description:
         description:
             - The description associated with the alarm definition.
     expression:
         description:
-            - The alarm definition expression, required for create/update operations.
+            - The alarm definition expression, required for create/update operations. It is checked against the
+              Monasca alarm expression grammar before connecting to the API, and compared with the existing
+              alarm definition in a normalised form so that differences in formatting alone do not update it.
     match_by:
         default: "[hostname]"
         description:
@@ -43,7 +45,14 @@ options:
             - The alarm definition name.
     ok_actions:
         description:
-            -  Array of notification method IDs that are invoked for the transition to the OK state.
+            -  Array of notification method IDs or names that are invoked for the transition to the OK state.
+    replace_on_match_by_change:
+        default: false
+        type: bool
+        description:
+            - The Monasca API does not allow the I(match_by) of an alarm definition to change. When C(true) an
+              existing alarm definition whose I(match_by) differs is deleted and created again, with a new ID and
+              without its alarms. When C(false) it is left unchanged and reported as a failure.
     severity:
         default: "LOW"
         description:
@@ -56,7 +65,8 @@ options:
               is used to determine the alarm definition to remove.
     undetermined_actions:
         description:
-            -  Array of notification method IDs that are invoked for the transition to the UNDETERMINED state.
+            -  Array of notification method IDs or names that are invoked for the transition to the UNDETERMINED
+               state. Names are resolved to IDs with one listing of the notification methods per invocation.
 extends_documentation_fragment: monasca
 '''
 
@@ -91,59 +101,97 @@ EXAMPLES = '''
 '''
 
 from ansible.module_utils.basic import AnsibleModule
-from ansible.module_utils.monasca import MonascaAnsible, argument_spec, mutually_exclusive
+from ansible.module_utils.monasca import (MonascaAnsible, MATCH_BY_ERROR, argument_spec, definition_fingerprint,
+                                          definition_replaced, expression_errors, mutually_exclusive)
 
 
 class MonascaDefinition(MonascaAnsible):
+    # When set, a dict of name to (id, fingerprint) of all existing definitions which is used instead of a name lookup
+    # and kept up to date with the changes made
+    definitions = None
+
     def run(self):
         name = self.module.params['name']
         expression = self.module.params['expression']
 
-        # Find existing definitions
-        definitions = {definition['name']: definition for definition in self.monasca.alarm_definitions.list()}
+        # Find the existing definition by name
+        existing = self._lookup(name)
 
         if self.module.params['state'] == 'absent':
-            if name not in definitions.keys():
+            if existing is None:
                 self._exit_json(changed=False)
 
             if self.module.check_mode:
                 self._exit_json(changed=True)
-            resp = self.monasca.alarm_definitions.delete(alarm_id=definitions[name]['id'])
+            resp = self._call(self.monasca.alarm_definitions.delete, alarm_id=existing[0])
             if resp.status_code == 204:
+                self._update_index(name, None)
                 self._exit_json(changed=True)
             else:
-                self.module.fail_json(msg=str(resp.status_code) + resp.text)
+                self._fail_json(msg=str(resp.status_code) + resp.text)
 
         else:  # Only other option is state=present
             def_kwargs = {"name": name, "description": self.module.params['description'], "expression": expression,
                           "match_by": self.module.params['match_by'], "severity": self.module.params['severity'],
-                          "alarm_actions": self.module.params['alarm_actions'],
-                          "ok_actions": self.module.params['ok_actions'],
-                          "undetermined_actions": self.module.params['undetermined_actions']}
-
-            if name in definitions.keys():
-                if definitions[name]['expression'] == expression and \
-                   definitions[name]['alarm_actions'] == self.module.params['alarm_actions'] and \
-                   definitions[name]['ok_actions'] == self.module.params['ok_actions'] and \
-                   definitions[name]['undetermined_actions'] == self.module.params['undetermined_actions']:
-                    self._exit_json(changed=False, alarm_definition_id=definitions[name]['id'])
-                def_kwargs['alarm_id'] = definitions[name]['id']
+                          "alarm_actions": self._resolve_notifications(self.module.params['alarm_actions']),
+                          "ok_actions": self._resolve_notifications(self.module.params['ok_actions']),
+                          "undetermined_actions": self._resolve_notifications(
+                              self.module.params['undetermined_actions'])}
+
+            if existing is not None and definition_replaced(existing[1], definition_fingerprint(def_kwargs)):
+                if not self.module.params['replace_on_match_by_change']:
+                    self._fail_json(msg=MATCH_BY_ERROR, alarm_definition_id=existing[0])
+                # match_by cannot be patched, so delete the definition to create it again below
+                if self.module.check_mode:
+                    self._exit_json(changed=True, alarm_definition_id=existing[0])
+                resp = self._call(self.monasca.alarm_definitions.delete, alarm_id=existing[0])
+                if resp.status_code != 204:
+                    self._fail_json(msg=str(resp.status_code) + resp.text)
+                self._update_index(name, None)
+                existing = None
+
+            if existing is not None:
+                if existing[1] == definition_fingerprint(def_kwargs):
+                    self._exit_json(changed=False, alarm_definition_id=existing[0])
+                def_kwargs['alarm_id'] = existing[0]
 
                 if self.module.check_mode:
-                    self._exit_json(changed=True, alarm_definition_id=definitions[name]['id'])
-                body = self.monasca.alarm_definitions.patch(**def_kwargs)
+                    self._exit_json(changed=True, alarm_definition_id=existing[0])
+                body = self._call(self.monasca.alarm_definitions.patch, **def_kwargs)
             else:
                 if self.module.check_mode:
                     self._exit_json(changed=True)
-                body = self.monasca.alarm_definitions.create(**def_kwargs)
+                body = self._call(self.monasca.alarm_definitions.create, **def_kwargs)
 
             if 'id' in body:
+                self._update_index(name, (body['id'], definition_fingerprint(def_kwargs)))
                 self._exit_json(changed=True, alarm_definition_id=body['id'])
             else:
-                self.module.fail_json(msg=body)
-
-
-def main():
+                self._fail_json(msg=body)
+
+    def _lookup(self, name):
+        """ Return the (id, fingerprint) of the existing alarm definition with name, or None
+        """
+        if self.definitions is not None:
+            return self.definitions.get(name)
+        definition = self._find('/alarm-definitions', name)
+        if definition is None:
+            return None
+        return definition['id'], definition_fingerprint(definition)
+
+    def _update_index(self, name, entry):
+        """ Record a change to the alarm definition with name, entry being its new (id, fingerprint) or None
+        """
+        self._invalidate_snapshot('/alarm-definitions')
+        if self.definitions is None:
+            return
+        if entry is None:
+            self.definitions.pop(name, None)
+        else:
+            self.definitions[name] = entry
+
+
+def definition_argument_spec():
     arg_spec = argument_spec()
     arg_spec.update(
         dict(
@@ -153,16 +201,31 @@ def main():
             match_by=dict(default=['hostname'], type='list'),
             name=dict(required=True, type='str'),
             ok_actions=dict(required=False, default=[], type='list'),
+            replace_on_match_by_change=dict(default=False, type='bool'),
             severity=dict(default='LOW', type='str'),
             state=dict(default='present', choices=['present', 'absent'], type='str'),
             undetermined_actions=dict(required=False, default=[], type='list'),
         )
     )
+    return arg_spec
+
+
+def check_expression(module):
+    """ Fail before authenticating if the expression param is not a valid alarm expression
+    """
+    if module.params['state'] == 'present' and module.params['expression'] is not None:
+        errors = expression_errors([module.params])
+        if errors:
+            module.fail_json(msg=errors[module.params['name']])
+
+
+def main():
     module = AnsibleModule(
-        argument_spec=arg_spec,
+        argument_spec=definition_argument_spec(),
         mutually_exclusive=mutually_exclusive(),
         supports_check_mode=True
     )
+    check_expression(module)
 
     definition = MonascaDefinition(module)
     definition.run()
@@ -0,0 +1,338 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# (C) Copyright 2020 StackHPC Ltd.
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+DOCUMENTATION = '''
+---
+module: monasca_alarm_definitions
+short_description: Reconcile a list of Monasca alarm definitions in one invocation
+description:
+    - "Performs crud operations (create/update/delete) on a whole list of monasca alarm definitions"
+    - "Authenticates and lists the existing alarm definitions once, rather than once per definition as happens
+       when looping over M(monasca_alarm_definition)."
+    - "The Monasca project homepage: U(https://wiki.openstack.org/wiki/Monasca)."
+    - "The alarm_definition_ids mapping of name to id is in the output and can be used with the register action"
+author:
+    - Isaac Prior <isaac@stackhpc.com>
+requirements: [ python-monascaclient , keystoneauth1 ]
+options:
+    alarm_actions:
+        description:
+            -  Array of notification method IDs or names that are invoked for the transition to the ALARM state.
+               Used for any alarm definition which does not set its own I(alarm_actions). Names are resolved to IDs
+               with one listing of the notification methods per invocation.
+    alarm_definitions:
+        description:
+            - List of alarm definitions. Each item takes the I(name), I(description), I(expression), I(match_by),
+              I(severity), I(alarm_actions), I(ok_actions) and I(undetermined_actions) options of
+              M(monasca_alarm_definition).
+            - With I(state=present) every expression is checked against the Monasca alarm expression grammar before
+              connecting to the API, and nothing is changed if any is invalid.
+            - At least one of I(alarm_definitions) and I(alarm_definition_templates) is required.
+    alarm_definition_templates:
+        description:
+            - List of templates which each generate a family of alarm definitions. Each item takes the options of an
+              I(alarm_definitions) item, in which C($param) or C(${param}) is replaced by the values of I(matrix),
+              and I(matrix). C($$) gives a literal C($).
+            - I(matrix) is either a dict of param to a list of values, generating an alarm definition for every
+              combination of them, or a list of dicts of param to value, generating one for each.
+            - The alarm definitions are generated one at a time while they are compared with the existing ones. With
+              I(cache_dir) set the fingerprints of the alarm definitions of each template are cached, so templates
+              which have not changed are neither validated nor fingerprinted again. Expressions are otherwise
+              checked as they are generated, and nothing is changed if any is invalid.
+    ok_actions:
+        description:
+            -  Array of notification method IDs or names that are invoked for the transition to the OK state.
+               Used for any alarm definition which does not set its own I(ok_actions).
+    prune:
+        default: false
+        type: bool
+        description:
+            - When C(true) and I(state=present), delete every existing alarm definition within I(prune_prefix)
+              which is not in I(alarm_definitions). In check mode the alarm definitions which would be deleted are
+              returned as C(deleted).
+    prune_prefix:
+        default: ""
+        description:
+            - Only alarm definitions whose names start with this prefix are deleted by I(prune).
+              The default prunes every alarm definition in the project.
+    replace_on_match_by_change:
+        default: false
+        type: bool
+        description:
+            - The Monasca API does not allow the I(match_by) of an alarm definition to change. When C(true) an
+              existing alarm definition whose I(match_by) differs is deleted and created again, with a new ID and
+              without its alarms, and returned as C(replaced). When C(false) it is left unchanged and reported as a
+              failure.
+    state:
+        default: "present"
+        choices: [ present, absent ]
+        description:
+            - Whether the alarm definitions should exist.  When C(absent), removes the alarm definitions. The name
+              is used to determine the alarm definitions to remove.
+    targets:
+        description:
+            - List of Keystone projects and Monasca regions to apply the alarm definitions to, instead of the one
+              given by the top level params. Each item takes I(keystone_project), I(monasca_endpoint_region) and
+              I(monasca_api_url), defaulting to the top level params. The Keystone login is rescoped once per
+              target and all targets are applied concurrently.
+            - The result for each target, keyed by C(project/region), is returned in C(targets).
+    undetermined_actions:
+        description:
+            -  Array of notification method IDs or names that are invoked for the transition to the UNDETERMINED
+               state.
+               Used for any alarm definition which does not set its own I(undetermined_actions).
+extends_documentation_fragment: monasca
+'''
+
+EXAMPLES = '''
+- name: Setup root email notification method
+  monasca_notification_method:
+    name: "Email Root"
+    type: 'EMAIL'
+    address: 'root@localhost'
+    keystone_url: "{{ keystone_url }}"
+    keystone_user: "{{ keystone_user }}"
+    keystone_password: "{{ keystone_password }}"
+    keystone_project: "{{ keystone_project }}"
+  register: default_notification
+- name: Create System Alarm Definitions
+  monasca_alarm_definitions:
+    alarm_definitions:
+      - { name: "High CPU usage", expression: "avg(cpu.idle_perc) < 10 times 3" }
+      - { name: "Disk Inode Usage", expression: "disk.inode_used_perc > 90", match_by: ["hostname", "device"] }
+    keystone_url: "{{ keystone_url }}"
+    keystone_user: "{{ keystone_user }}"
+    keystone_password: "{{ keystone_password }}"
+    keystone_project: "{{ keystone_project }}"
+    alarm_actions:
+      - "{{ default_notification.notification_method_id }}"
+    ok_actions:
+      - "{{ default_notification.notification_method_id }}"
+    undetermined_actions:
+      - "{{ default_notification.notification_method_id }}"
+- name: Create a process alarm definition for each service on each of two severities
+  monasca_alarm_definitions:
+    alarm_definition_templates:
+      - name: "$service processes ($severity)"
+        description: "Alarms when there are fewer than $minimum $service processes"
+        expression: "process.pid_count{process_name=$service} < $minimum"
+        match_by: ["hostname"]
+        severity: "$severity"
+        matrix:
+          - { service: "nova-api", minimum: 4, severity: "HIGH" }
+          - { service: "nova-api", minimum: 8, severity: "LOW" }
+          - { service: "neutron-server", minimum: 2, severity: "HIGH" }
+    keystone_url: "{{ keystone_url }}"
+    keystone_user: "{{ keystone_user }}"
+    keystone_password: "{{ keystone_password }}"
+    keystone_project: "{{ keystone_project }}"
+- name: Replace every alarm definition starting with "Ceph" with the given list
+  monasca_alarm_definitions:
+    alarm_definitions: "{{ ceph_alarm_definitions }}"
+    prune: true
+    prune_prefix: "Ceph"
+    keystone_url: "{{ keystone_url }}"
+    keystone_user: "{{ keystone_user }}"
+    keystone_password: "{{ keystone_password }}"
+    keystone_project: "{{ keystone_project }}"
+'''
+
+import itertools
+import time
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.monasca import (MonascaAnsible, DEFINITION_ACTIONS, FINGERPRINT_VERSION, MATCH_BY_ERROR,
+                                          argument_spec, definition_fingerprint, definition_replaced, expand_template,
+                                          expression_errors, fingerprint, mutually_exclusive, target_argument_spec)
+
+# Seconds for which the fingerprints of the alarm definitions generated by a template are cached. Entries are keyed
+# by the template itself, so this only bounds the size of the cache.
+TEMPLATE_CACHE_TTL = 7 * 24 * 3600
+
+
+class MonascaDefinitions(MonascaAnsible):
+    def run(self):
+        if self.module.params['targets']:
+            self._run_targets()
+
+        # Fingerprints of the generated alarm definitions by name, from the template cache or computed as they are
+        # generated, which _fingerprint uses instead of fingerprinting them again. Existing alarm definitions are
+        # always fingerprinted with definition_fingerprint.
+        self.fingerprints = {}
+        self.template_cache = self._cache('templates') if self.module.params['cache_dir'] is not None else None
+        prune_prefix = self.module.params['prune_prefix'] if self.module.params['prune'] else None
+        replace_error = None if self.module.params['replace_on_match_by_change'] else MATCH_BY_ERROR
+
+        result = self._reconcile('/alarm-definitions', _Desired(self._desired_definitions), definition_fingerprint,
+                                 self._create, self._patch, self._delete, prune_prefix, self._fingerprint,
+                                 definition_replaced, replace_error)
+        errors = result.pop('errors')
+        changed = bool(result['created'] or result['updated'] or result['replaced'] or result['deleted'])
+        if errors:
+            self._fail_json(msg='Failed to apply {} alarm definition changes'.format(len(errors)), failures=errors,
+                            changed=changed, alarm_definition_ids=result.pop('ids'), **result)
+        self._exit_json(changed=changed, alarm_definition_ids=result.pop('ids'), **result)
+
+    def _create(self, **def_kwargs):
+        return self._check_body(self._call(self.monasca.alarm_definitions.create, **def_kwargs))
+
+    def _patch(self, alarm_id, **def_kwargs):
+        return self._check_body(self._call(self.monasca.alarm_definitions.patch, alarm_id=alarm_id, **def_kwargs))
+
+    def _delete(self, alarm_id):
+        resp = self._call(self.monasca.alarm_definitions.delete, alarm_id=alarm_id)
+        if resp.status_code != 204:
+            raise Exception(str(resp.status_code) + resp.text)
+
+    @staticmethod
+    def _check_body(body):
+        """ Return the id of a created or patched alarm definition
+        """
+        if 'id' not in body:
+            raise Exception(body)
+        return body['id']
+
+    def _desired_definitions(self):
+        """ Yield the alarm_definitions param and the expansions of the alarm_definition_templates param as
+            create/patch kwargs, applying the module level notification actions to any item which does not set its
+            own and resolving notification method names. Fails once every expansion has been generated if any of
+            them has an invalid expression.
+        """
+        names = set()
+        errors = {}
+        for def_kwargs in itertools.chain(self._definitions(), self._template_definitions(errors)):
+            if def_kwargs['name'] in names:
+                self._fail_json(msg='Duplicate alarm definition name: {}'.format(def_kwargs['name']))
+            names.add(def_kwargs['name'])
+            yield def_kwargs
+
+        if errors:
+            self._fail_json(msg='Invalid expressions in {} alarm definitions'.format(len(errors)), failures=errors)
+
+    def _definitions(self):
+        for item in self.module.params['alarm_definitions'] or []:
+            def_kwargs = dict(item)
+            for action in DEFINITION_ACTIONS:
+                def_kwargs[action] = self._actions(def_kwargs, action)
+            yield def_kwargs
+
+    def _template_definitions(self, errors):
+        """ Yield the expansions of the alarm_definition_templates param, adding those with invalid expressions to
+            errors instead. The expansions of a template found in the template cache are not checked again.
+        """
+        for template in self.module.params['alarm_definition_templates'] or []:
+            template = dict(template)
+            for action in DEFINITION_ACTIONS:
+                template[action] = self._actions(template, action)
+            template_key = fingerprint(FINGERPRINT_VERSION, template)
+            cached = self.template_cache.get(template_key) if self.template_cache is not None else None
+            check = cached is None and self.module.params['state'] == 'present'
+            if cached is not None:
+                self.fingerprints.update(cached)
+
+            fingerprints = {}
+            valid = True
+            try:
+                for def_kwargs in expand_template(template):
+                    if check:
+                        error = expression_errors([def_kwargs]).get(def_kwargs['name'])
+                        if error is not None:
+                            errors[def_kwargs['name']] = error
+                            valid = False
+                            continue
+                        fingerprints[def_kwargs['name']] = definition_fingerprint(def_kwargs)
+                        self.fingerprints[def_kwargs['name']] = fingerprints[def_kwargs['name']]
+                    yield def_kwargs
+            except (KeyError, ValueError) as e:
+                self._fail_json(msg='Invalid param {} in alarm definition template {}'.format(e, template['name']))
+
+            if check and valid and self.template_cache is not None:
+                self.template_cache.set(template_key, fingerprints, time.time() + TEMPLATE_CACHE_TTL)
+
+    def _actions(self, item, action):
+        """ Return the notification method ids for an action of an item, or of the module if the item has none
+        """
+        actions = self.module.params[action] if item[action] is None else item[action]
+        if self.module.params['state'] == 'present':
+            return self._resolve_notifications(actions)
+        return actions
+
+    def _fingerprint(self, def_kwargs):
+        result = self.fingerprints.get(def_kwargs['name'])
+        return result if result is not None else definition_fingerprint(def_kwargs)
+
+
+class _Desired(object):
+    """ The alarm definitions generated by function, which are generated again each time they are iterated so that
+        they are never all held in memory
+    """
+    def __init__(self, function):
+        self.function = function
+
+    def __iter__(self):
+        return self.function()
+
+
+def main():
+    arg_spec = argument_spec()
+    arg_spec.update(target_argument_spec())
+    arg_spec.update(
+        dict(
+            alarm_actions=dict(required=False, default=[], type='list'),
+            alarm_definitions=dict(required=False, type='list', elements='dict', options=dict(
+                alarm_actions=dict(required=False, type='list'),
+                description=dict(required=False, default='', type='str'),
+                expression=dict(required=False, type='str'),
+                match_by=dict(default=['hostname'], type='list'),
+                name=dict(required=True, type='str'),
+                ok_actions=dict(required=False, type='list'),
+                severity=dict(default='LOW', type='str'),
+                undetermined_actions=dict(required=False, type='list'),
+            )),
+            alarm_definition_templates=dict(required=False, type='list', elements='dict', options=dict(
+                alarm_actions=dict(required=False, type='list'),
+                description=dict(required=False, default='', type='str'),
+                expression=dict(required=True, type='str'),
+                match_by=dict(default=['hostname'], type='list'),
+                matrix=dict(required=True, type='raw'),
+                name=dict(required=True, type='str'),
+                ok_actions=dict(required=False, type='list'),
+                severity=dict(default='LOW', type='str'),
+                undetermined_actions=dict(required=False, type='list'),
+            )),
+            ok_actions=dict(required=False, default=[], type='list'),
+            prune=dict(default=False, type='bool'),
+            prune_prefix=dict(default='', type='str'),
+            replace_on_match_by_change=dict(default=False, type='bool'),
+            state=dict(default='present', choices=['present', 'absent'], type='str'),
+            undetermined_actions=dict(required=False, default=[], type='list'),
+        )
+    )
+    module = AnsibleModule(
+        argument_spec=arg_spec,
+        mutually_exclusive=mutually_exclusive(),
+        required_one_of=[['alarm_definitions', 'alarm_definition_templates']],
+        supports_check_mode=True
+    )
+
+    # Check the whole catalog before paying for authentication and listing, or applying any of it
+    if module.params['state'] == 'present':
+        errors = expression_errors(module.params['alarm_definitions'] or [])
+        if errors:
+            module.fail_json(msg='Invalid expressions in {} alarm definitions'.format(len(errors)), failures=errors)
+
+    definitions = MonascaDefinitions(module)
+    definitions.run()
+
+
+if __name__ == "__main__":
+    main()
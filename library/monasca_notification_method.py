@@ -75,7 +75,7 @@ EXAMPLES = '''
 '''
 
 from ansible.module_utils.basic import AnsibleModule
-from ansible.module_utils.monasca import MonascaAnsible, argument_spec, mutually_exclusive
+from ansible.module_utils.monasca import MonascaAnsible, argument_spec, mutually_exclusive, notification_fingerprint
 
 
 class MonascaNotification(MonascaAnsible):
@@ -84,11 +84,7 @@ class MonascaNotification(MonascaAnsible):
         type = self.module.params['type']
         address = self.module.params['address']
 
-        notifications = {notif['name']: notif for notif in self.monasca.notifications.list()}
-        if name in notifications.keys():
-            notification = notifications[name]
-        else:
-            notification = None
+        notification = self._find('/notification-methods', name)
 
         if self.module.params['state'] == 'absent':
             if notification is None:
@@ -97,7 +93,8 @@ class MonascaNotification(MonascaAnsible):
                 if self.module.check_mode:
                     self._exit_json(changed=True)
 
-                self.monasca.notifications.delete(notification_id=notification['id'])
+                self._call(self.monasca.notifications.delete, notification_id=notification['id'])
+                self._invalidate_notification_ids()
                 self._exit_json(changed=True)
 
         else:  # Only other option is present
@@ -105,18 +102,20 @@ class MonascaNotification(MonascaAnsible):
                 if self.module.check_mode:
                     self._exit_json(changed=True)
 
-                body = self.monasca.notifications.create(name=name, type=type, address=address)
+                body = self._call(self.monasca.notifications.create, name=name, type=type, address=address)
+                self._invalidate_notification_ids()
                 self._exit_json(changed=True, notification_method_id=body['id'])
 
             else:
-                if notification['type'] == type and notification['address'] == address:
+                if notification_fingerprint(notification) == notification_fingerprint(self.module.params):
                     self._exit_json(changed=False, notification_method_id=notification['id'])
                 else:
                     if self.module.check_mode:
                         self._exit_json(changed=True, notification_method_id=notification['id'])
 
-                    self.monasca.notifications.update(notification_id=notification['id'],
-                                                      name=name, type=type, address=address)
+                    self._call(self.monasca.notifications.update, notification_id=notification['id'],
+                               name=name, type=type, address=address)
+                    self._invalidate_notification_ids()
                     self._exit_json(changed=True, notification_method_id=notification['id'])
 
 
@@ -0,0 +1,134 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# (C) Copyright 2020 StackHPC Ltd.
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+DOCUMENTATION = '''
+---
+module: monasca_notification_methods
+short_description: Reconcile a list of Monasca notification methods in one invocation
+description:
+    - "Performs crud operations (create/update/delete) on a whole list of monasca notification methods."
+    - "Authenticates and lists the existing notification methods once, and applies the changes concurrently."
+    - "The Monasca project homepage: U(https://wiki.openstack.org/wiki/Monasca)."
+    - "The notification_method_ids mapping of name to id is in the output and can be used with the register action."
+author:
+    - Isaac Prior <isaac@stackhpc.com>
+requirements: [ python-monascaclient , keystoneauth1 ]
+options:
+    notification_methods:
+        required: true
+        description:
+            - List of notification methods. Each item takes the I(name), I(type) and I(address) options of
+              M(monasca_notification_method).
+    state:
+        default: "present"
+        choices: [ present, absent ]
+        description:
+            - Whether the notification methods should exist.  When C(absent), removes the notification methods.
+    targets:
+        description:
+            - List of Keystone projects and Monasca regions to apply the notification methods to, instead of the
+              one given by the top level params. Each item takes I(keystone_project), I(monasca_endpoint_region) and
+              I(monasca_api_url), defaulting to the top level params. The Keystone login is rescoped once per
+              target and all targets are applied concurrently.
+            - The result for each target, keyed by C(project/region), is returned in C(targets).
+extends_documentation_fragment: monasca
+'''
+
+EXAMPLES = '''
+- name: Setup notification methods
+  monasca_notification_methods:
+    notification_methods:
+      - { name: "Email Root", type: "EMAIL", address: "root@localhost" }
+      - { name: "Ops Webhook", type: "WEBHOOK", address: "https://ops.example.com/hook" }
+    keystone_url: "{{ keystone_url }}"
+    keystone_user: "{{ keystone_user }}"
+    keystone_password: "{{ keystone_password }}"
+    keystone_project: "{{ keystone_project }}"
+  register: notifications
+- name: Create System Alarm Definitions
+  monasca_alarm_definitions:
+    alarm_definitions:
+      - { name: "High CPU usage", expression: "avg(cpu.idle_perc) < 10 times 3" }
+    keystone_url: "{{ keystone_url }}"
+    keystone_user: "{{ keystone_user }}"
+    keystone_password: "{{ keystone_password }}"
+    keystone_project: "{{ keystone_project }}"
+    alarm_actions:
+      - "{{ notifications.notification_method_ids['Email Root'] }}"
+      - "{{ notifications.notification_method_ids['Ops Webhook'] }}"
+'''
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.monasca import (MonascaAnsible, argument_spec, mutually_exclusive, notification_fingerprint,
+                                          target_argument_spec)
+
+
+class MonascaNotifications(MonascaAnsible):
+    def run(self):
+        if self.module.params['targets']:
+            self._run_targets()
+
+        desired = []
+        names = set()
+        for item in self.module.params['notification_methods']:
+            if item['name'] in names:
+                self._fail_json(msg='Duplicate notification method name: {}'.format(item['name']))
+            names.add(item['name'])
+            desired.append(dict(item))
+
+        result = self._reconcile('/notification-methods', desired, notification_fingerprint,
+                                 self._create, self._update, self._delete)
+        errors = result.pop('errors')
+        changed = bool(result['created'] or result['updated'] or result['deleted'])
+        if changed and not self.module.check_mode:
+            self._invalidate_notification_ids()
+        if errors:
+            self._fail_json(msg='Failed to apply {} notification method changes'.format(len(errors)), failures=errors,
+                            changed=changed, notification_method_ids=result.pop('ids'), **result)
+        self._exit_json(changed=changed, notification_method_ids=result.pop('ids'), **result)
+
+    def _create(self, **kwargs):
+        return self._call(self.monasca.notifications.create, **kwargs)['id']
+
+    def _update(self, notification_id, **kwargs):
+        self._call(self.monasca.notifications.update, notification_id=notification_id, **kwargs)
+        return notification_id
+
+    def _delete(self, notification_id):
+        self._call(self.monasca.notifications.delete, notification_id=notification_id)
+
+
+def main():
+    arg_spec = argument_spec()
+    arg_spec.update(target_argument_spec())
+    arg_spec.update(
+        dict(
+            notification_methods=dict(required=True, type='list', elements='dict', options=dict(
+                address=dict(required=True, type='str'),
+                name=dict(required=True, type='str'),
+                type=dict(required=True, type='str'),
+            )),
+            state=dict(default='present', choices=['present', 'absent'], type='str'),
+        )
+    )
+    module = AnsibleModule(
+        argument_spec=arg_spec,
+        mutually_exclusive=mutually_exclusive(),
+        supports_check_mode=True
+    )
+
+    notifications = MonascaNotifications(module)
+    notifications.run()
+
+
+if __name__ == "__main__":
+    main()
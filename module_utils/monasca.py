@@ -20,10 +20,44 @@ author:
     - Isaac Prior <isaac@stackhpc.com>
 requirements: [ python-monascaclient , keystoneauth1 ]
 options:
+    api_retries:
+        default: 5
+        description:
+            - The number of times to retry a request which the Monasca or Keystone API throttles with a 429 or 503
+              response. The number of retries and the seconds spent waiting are returned as C(api_retries) and
+              C(api_throttled_seconds).
     api_version:
         default: '2_0'
         description:
             - The monasca api version.
+    cache_dir:
+        description:
+            - Directory in which to cache the Keystone token and service catalog between module invocations.
+              Caching is disabled unless this is set. Cached tokens are reused until they expire.
+            - M(monasca_alarm_definitions) and M(monasca_notification_methods) also journal the changes they plan
+              and apply here. A run with the same params after one which was interrupted, or failed to apply some
+              changes, within a day resumes its plan instead of listing the collection again, checking only the
+              changes which were in progress. Whether a run resumed is returned as C(journal_resumed).
+    endpoint_cache_ttl:
+        default: 3600
+        description:
+            - Seconds for which a discovered I(monasca_api_url) is cached in I(cache_dir). Set to 0 to always
+              discover the endpoint. Whether the cache was hit is returned as C(endpoint_cache_hit).
+    http_client:
+        default: monascaclient
+        choices: [ monascaclient, requests ]
+        description:
+            - The client used to call the Keystone and Monasca APIs. C(monascaclient) uses python-monascaclient and
+              keystoneauth1. C(requests) uses a minimal built in client which only needs the requests library and
+              starts several times faster, as python-monascaclient takes most of the startup time of a module.
+              Both share the token cache in I(cache_dir). C(requests) appends I(api_version) to a catalog endpoint
+              which does not end with a version, where keystoneauth1 finds it through version discovery.
+    http_pool_size:
+        description:
+            - The number of persistent connections kept open to each of the Keystone and Monasca APIs, which are
+              reused for every request. Defaults to I(max_workers), so that every concurrent request has its own
+              connection and none is opened and closed for each write. Responses are requested gzip compressed,
+              which reduces the size of large listings when the API or a proxy in front of it compresses them.
     keystone_password:
         description:
             - Keystone password to use for authentication, required unless a I(keystone_token) is specified.
@@ -43,6 +77,11 @@ options:
         required: true
         description:
             - Keystone project name to obtain a token for.
+    max_workers:
+        default: 4
+        description:
+            - The maximum number of concurrent requests made to the Monasca API when applying changes to many
+              entries at once.
     monasca_api_url:
         description:
             - Service endpoint for the monasca api.
@@ -63,16 +102,75 @@ options:
         default: ['admin', 'internal']
         description:
             - The monasca api interface. Used to discover the endpoint if I(monasca_api_url) is not provided.
+    notification_cache_ttl:
+        default: 300
+        description:
+            - Seconds for which the notification method ids, used to resolve notification method names given as
+              alarm actions, are cached in I(cache_dir). Set to 0 to list the notification methods every time.
+    page_size:
+        description:
+            - The number of entries to request per page when listing alarm definitions or notification methods.
+              Defaults to the page size of the Monasca API.
+    snapshot_refresh:
+        default: false
+        type: bool
+        description:
+            - List the alarm definitions or notification methods instead of using the snapshot in I(cache_dir), and
+              save a new snapshot.
+    snapshot_ttl:
+        default: 0
+        description:
+            - Seconds for which an index of the names, ids and fingerprints of the alarm definitions or notification
+              methods is kept in I(cache_dir) after listing them. While it is fresh, and a one entry listing sorted
+              by C(updated_at) shows the most recently updated entry is unchanged, check mode and runs which change
+              nothing use the snapshot instead of listing the collection. Runs which make changes list the
+              collection before applying them and then discard the snapshot. Set to 0 to always list the collection.
+            - Deletions made outside of these modules are not detected until the snapshot expires.
+              Whether the snapshot was used is returned as C(snapshot_hit).
 '''
 
-try:
-    from monascaclient import client as mon_client
-    from keystoneauth1 import identity
-    from keystoneauth1 import session
-except ImportError:
-    HAS_MONASCACLIENT = False
-else:
-    HAS_MONASCACLIENT = True
+import calendar
+import collections
+import contextlib
+import email.utils
+import fcntl
+import functools
+import hashlib
+import itertools
+import json
+import os
+import random
+import re
+import string
+import tempfile
+import threading
+import time
+
+from ansible.module_utils.monasca_expression import ExpressionError, normalise_expression
+
+# The classes used to call the Keystone and Monasca APIs, which come from keystoneauth1 and python-monascaclient or
+# from monasca_rest depending on the http_client param, see _client_classes
+_ClientClasses = collections.namedtuple('_ClientClasses', ['Password', 'Token', 'Session', 'TCPKeepAliveAdapter',
+                                                           'Client', 'BadRequest', 'ConnectionError'])
+
+# HTTP statuses with which Monasca or Keystone signal that requests should be retried more slowly
+RETRY_STATUSES = (429, 503)
+DEFINITION_ACTIONS = ('alarm_actions', 'ok_actions', 'undetermined_actions')
+NOTIFICATION_ID = re.compile(r'^[0-9a-f]{8}-?([0-9a-f]{4}-?){3}[0-9a-f]{12}$', re.IGNORECASE)
+RETRY_BACKOFF = 0.5
+RETRY_BACKOFF_MAX = 30
+# Upper bounds in seconds of the buckets of the latency histograms returned in api_calls
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Environment variable naming a directory to write a cProfile stats file of each module invocation to
+PROFILE_ENV = 'MONASCA_ANSIBLE_PROFILE'
+# Seconds after which the journal of an interrupted run is no longer resumed, as the collection may have changed
+JOURNAL_MAX_AGE = 24 * 3600
+# Changed whenever the format of fingerprints changes, so that those cached by earlier versions are not compared
+FINGERPRINT_VERSION = 2
+# The failure of an alarm definition whose match_by differs when replace_on_match_by_change is not set, as the Monasca
+# API rejects the change
+MATCH_BY_ERROR = 'The match_by of an existing alarm definition cannot be changed, set replace_on_match_by_change to ' \
+    'delete it and create it again'
 
 
 class MonascaAnsible(object):
@@ -82,17 +180,45 @@ class MonascaAnsible(object):
         - api_version
         - keystone_project
         - keystone_token or keystone_url, keystone_user and keystone_password
+        A token given to the constructor is rescoped to the keystone_project param instead, see _run_targets.
     """
-    def __init__(self, module):
+    def __init__(self, module, token=None):
         self.module = module
+        self.token = token
 
-        if not HAS_MONASCACLIENT:
-            self.module.fail_json(msg='Failed to import python-monascaclient or keystoneauth1')
+        try:
+            self.clients = _client_classes(self.module.params['http_client'])
+        except ImportError as e:
+            self.module.fail_json(msg='Failed to import the {} http_client: {}'.format(
+                self.module.params['http_client'], e))
 
+        self._start_profile()
         self.api_version = self.module.params['api_version']
+        self.exit_data = {}
+        self.limiter = _AdaptiveLimiter(self.module.params['max_workers'])
+        self.instruments = _Instruments(self.module.params['keystone_url'])
 
-        # Create a keystone session from a password
-        if self.module.params['keystone_token'] is None:
+        self.notification_ids = None
+        self.notification_cached = False
+
+        if self.module.params['cache_dir'] is None:
+            self.token_cache = None
+            self.endpoint_cache = None
+            self.notification_cache = None
+            self.snapshot_cache = None
+        else:
+            self.token_cache = self._cache('tokens')
+            self.endpoint_cache = self._cache('endpoints') if self.module.params['endpoint_cache_ttl'] > 0 else None
+            self.notification_cache = self._cache('notifications') \
+                if self.module.params['notification_cache_ttl'] > 0 else None
+            self.snapshot_cache = self._cache('snapshots') if self.module.params['snapshot_ttl'] > 0 else None
+
+        if self.module.params.get('targets'):
+            # Only the login is needed, which _run_targets rescopes to each of the targets
+            self.session = self._keystone_session()
+            return
+
+        if self.module.params['keystone_token'] is None or self.token is not None:
             sess = self._keystone_session()
 
             if self.module.params['monasca_api_url'] is None:
@@ -100,70 +226,995 @@ class MonascaAnsible(object):
             else:
                 self.api_url = self.module.params['monasca_api_url']
 
-            self.exit_data = {'monasca_api_url': self.api_url}
-
-            self.monasca = mon_client.Client(api_version=self.api_version,
-                                             endpoint=self.api_url,
-                                             session=sess)
-
         else:  # user has supplied a keystone token
-            self.token = self.module.params['keystone_token']
             if self.module.params['monasca_api_url'] is None:
                 self.module.fail_json(msg='monasca_api_url param is required when using keystone_token')
 
+            sess = self._keystone_session()
             self.api_url = self.module.params['monasca_api_url']
 
-            self.exit_data = {'monasca_api_url': self.api_url}
+        self.session = sess
+        self.exit_data['monasca_api_url'] = self.api_url
 
-            self.monasca = mon_client.Client(api_version=self.api_version,
-                                             endpoint=self.api_url,
-                                             token=self.token,
-                                             project_name=self.module.params['keystone_project'],
-                                             auth_url=self.module.params['keystone_url'],
-                                             project_domain_id=self.module.params['project_domain_id']
-                                             )
+        self.monasca = self.clients.Client(api_version=self.api_version,
+                                           endpoint=self.api_url,
+                                           session=sess)
+
+    def _rebind(self, module):
+        """ Reuse this client, with its session and discovered endpoint, for another module invocation
+            The new module must have the same connection params as the one the client was built with.
+        """
+        self.module = module
+        self._start_profile()
+        self.limiter = _AdaptiveLimiter(self.module.params['max_workers'])
+        self.instruments = _Instruments(self.module.params['keystone_url'])
 
     def _exit_json(self, **kwargs):
         """ Exit with supplied kwargs combined with the self.exit_data
         """
-        kwargs.update(self.exit_data)
+        self._save_auth_state()
+        stats = self._stats()
+        kwargs.update(self.exit_data, **stats)
         self.module.exit_json(**kwargs)
 
-    def _keystone_session(self):
-        """ Return a Keystone session
+    def _fail_json(self, **kwargs):
+        """ Fail with supplied kwargs combined with the self.exit_data
+        """
+        stats = self._stats()
+        kwargs.update(self.exit_data, **stats)
+        self.module.fail_json(**kwargs)
+
+    def _stats(self):
+        """ Return the retry and per phase API call statistics, writing the profile if one is being taken
+        """
+        self._dump_profile()
+        stats = self.limiter.stats()
+        stats['api_calls'] = self.instruments.stats()
+        return stats
+
+    def _start_profile(self):
+        """ Profile the module invocation if the PROFILE_ENV environment variable names a directory
+            Jobs run by _run_concurrently are profiled on their worker threads and merged into the same stats.
+        """
+        self.profiler = None
+        self.profiles = []
+        # Targets are already profiled as jobs of _run_targets
+        if not os.environ.get(PROFILE_ENV) or self.token is not None:
+            return
+        import cProfile
+        self.profiler = cProfile.Profile()
+        self.profiler.enable()
+
+    def _dump_profile(self):
+        """ Write the profile of the module invocation to a pstats file in the PROFILE_ENV directory
+        """
+        if self.profiler is None:
+            return
+        import pstats
+        self.profiler.disable()
+        stats = pstats.Stats(self.profiler)
+        for profile in self.profiles:
+            stats.add(profile)
+        path = os.path.join(os.environ[PROFILE_ENV], '{}-{}-{}.pstats'.format(
+            type(self).__name__, os.getpid(), int(time.time() * 1000)))
+        stats.dump_stats(path)
+        self.exit_data['profile'] = path
+        self.profiler = None
+
+    def _profiled(self, function):
+        """ Return function wrapped to be profiled on whichever thread calls it, if a profile is being taken
+        """
+        if self.profiler is None:
+            return function
+
+        def profiled(*args, **kwargs):
+            import cProfile
+            profile = cProfile.Profile()
+            try:
+                return profile.runcall(function, *args, **kwargs)
+            finally:
+                self.profiles.append(profile)
+        return profiled
+
+    def _call(self, function, *args, **kwargs):
+        """ Return function(*args, **kwargs), a call to the Monasca or Keystone API
+            Calls are limited to the concurrency the API currently sustains. Calls which are throttled are retried
+            up to api_retries times, after the Retry-After time if the API gave one or else after a jittered
+            exponential backoff.
+        """
+        attempt = 0
+        while True:
+            with self.limiter:
+                try:
+                    result = function(*args, **kwargs)
+                except Exception as e:
+                    if getattr(e, 'http_status', None) not in RETRY_STATUSES or \
+                       attempt >= self.module.params['api_retries']:
+                        raise
+                    delay = _retry_after(e)
+                    if delay is None:
+                        delay = random.uniform(0, min(RETRY_BACKOFF_MAX, RETRY_BACKOFF * 2 ** attempt))
+                    self.limiter.throttled(delay)
+                else:
+                    self.limiter.succeeded()
+                    return result
+            time.sleep(delay)
+            attempt += 1
+
+    def _cache(self, name):
+        """ Return the named _FileCache within the cache_dir param
         """
-        auth = identity.Password(
+        return _FileCache(self._cache_path(name + '.json'))
+
+    def _cache_path(self, filename):
+        """ Return the path of a file within the cache_dir param, creating the cache_dir if needed
+        """
+        cache_dir = self.module.params['cache_dir']
+        try:
+            os.makedirs(cache_dir, 0o700)
+        except OSError:
+            if not os.path.isdir(cache_dir):
+                self.module.fail_json(msg='Unable to create cache_dir {}'.format(cache_dir))
+        return os.path.join(cache_dir, filename)
+
+    def _cache_key(self, *params):
+        """ Return a digest of the named params, suitable for keying a cache without storing secrets
+        """
+        values = [self.module.params[param] for param in params]
+        return hashlib.sha256(json.dumps(values, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _keystone_auth(self):
+        """ Return a Keystone auth plugin for either the keystone token or user and password
+        """
+        if self.token is not None:
+            return self.clients.Token(
+                auth_url=self.module.params['keystone_url'],
+                token=self.token,
+                project_name=self.module.params['keystone_project'],
+                project_domain_id=self.module.params['project_domain_id']
+            )
+        if self.module.params['keystone_token'] is None:
+            return self.clients.Password(
+                auth_url=self.module.params['keystone_url'],
+                username=self.module.params['keystone_user'],
+                password=self.module.params['keystone_password'],
+                project_name=self.module.params['keystone_project'],
+                user_domain_id=self.module.params['user_domain_id'],
+                project_domain_id=self.module.params['project_domain_id']
+            )
+        return self.clients.Token(
             auth_url=self.module.params['keystone_url'],
-            username=self.module.params['keystone_user'],
-            password=self.module.params['keystone_password'],
+            token=self.module.params['keystone_token'],
             project_name=self.module.params['keystone_project'],
-            user_domain_id=self.module.params['user_domain_id'],
             project_domain_id=self.module.params['project_domain_id']
         )
-        return session.Session(auth=auth)
+
+    def _keystone_session(self):
+        """ Return a Keystone session
+            When a cache_dir is set the scoped token and service catalog are restored from the token cache and
+            only fetched from Keystone once they have expired. A revoked token is refreshed by the session when
+            the Monasca API rejects it.
+        """
+        auth = self._keystone_auth()
+        sess = self.clients.Session(auth=auth)
+        sess.session.hooks['response'].append(self._record_response)
+
+        # Size the connection pool so that every worker of _run_concurrently can keep its connection open
+        pool_size = self.module.params['http_pool_size'] or self.module.params['max_workers']
+        for scheme in list(sess.session.adapters):
+            sess.session.mount(scheme, self.clients.TCPKeepAliveAdapter(pool_maxsize=pool_size))
+        # Set explicitly rather than relying on the default headers of the requests version installed
+        sess.session.headers['Accept-Encoding'] = 'gzip, deflate'
+
+        if self.token_cache is None:
+            return sess
+
+        self.token_cache_key = self._cache_key('keystone_url', 'keystone_user', 'keystone_password',
+                                               'keystone_token', 'keystone_project', 'user_domain_id',
+                                               'project_domain_id')
+        self.auth_state = self.token_cache.get(self.token_cache_key)
+        auth.set_auth_state(self.auth_state)
+        try:
+            self._call(auth.get_access, sess)
+        except Exception as e:
+            self.module.fail_json(msg='Error authenticating with Keystone: {}'.format(e))
+        self.auth = auth
+        self._save_auth_state()
+        return sess
+
+    def _save_auth_state(self):
+        """ Write the current token to the token cache if it has changed since it was last read or written
+        """
+        if self.token_cache is None:
+            return
+        auth_state = self.auth.get_auth_state()
+        if auth_state is None or auth_state == self.auth_state:
+            return
+        expires = calendar.timegm(self.auth.auth_ref.expires.utctimetuple())
+        self.token_cache.set(self.token_cache_key, auth_state, expires)
+        self.auth_state = auth_state
 
     def _endpoint_discover(self, sess):
         """ Return the Monasca API URL
+            When a cache_dir is set the discovered URL is cached for endpoint_cache_ttl seconds.
         """
+        cache_key = self.endpoint_cache_key = self._cache_key('keystone_url', 'monasca_endpoint_region',
+                                                              'monasca_endpoint_interface', 'api_version')
+        if self.endpoint_cache is not None:
+            api_url = self.endpoint_cache.get(cache_key)
+            self.exit_data['endpoint_cache_hit'] = api_url is not None
+            if api_url is not None:
+                return api_url
+
         min_version = self.module.params['api_version'].replace('_', '.')
         try:
-            resp = sess.get('/',
-                            endpoint_filter={'service_type': 'monitoring',
-                                             'interface': self.module.params['monasca_endpoint_interface'],
-                                             'region_name': self.module.params['monasca_endpoint_region'],
-                                             'version': min_version})
+            with self.instruments.phase('discover'):
+                resp = self._call(sess.get, '/',
+                                  endpoint_filter={'service_type': 'monitoring',
+                                                   'interface': self.module.params['monasca_endpoint_interface'],
+                                                   'region_name': self.module.params['monasca_endpoint_region'],
+                                                   'version': min_version})
         except Exception as e:
+            self._invalidate_endpoint(cache_key)
             self.module.fail_json(msg='Error discovering Monasca API URL from catalogue: {}'.format(e))
         else:
             if not resp.ok:
+                self._invalidate_endpoint(cache_key)
                 self.module.fail_json(msg=str(resp.status_code) + resp.text)
 
+        if self.endpoint_cache is not None:
+            self.endpoint_cache.set(cache_key, resp.url, time.time() + self.module.params['endpoint_cache_ttl'])
         return resp.url
 
+    def _run_targets(self):
+        """ Run the module for each of the targets param and exit with a summary per target
+            The login is rescoped once per target, to the keystone_project of the target, and the Monasca API URL
+            of each target is discovered in its monasca_endpoint_region unless it sets monasca_api_url. Targets
+            default to the top level params. All targets are run concurrently, each with up to max_workers
+            concurrent requests of its own, so the time taken is that of the slowest target.
+        """
+        targets = {}
+        for target in self.module.params['targets']:
+            params = dict(self.module.params, targets=None)
+            params.update((name, value) for name, value in target.items() if value is not None)
+            label = '{}/{}'.format(params['keystone_project'], params['monasca_api_url'] or
+                                   params['monasca_endpoint_region'])
+            if label in targets:
+                self._fail_json(msg='Duplicate target: {}'.format(label))
+            targets[label] = params
+
+        try:
+            token = self._call(self.session.get_token)
+        except Exception as e:
+            self._fail_json(msg='Error authenticating with Keystone: {}'.format(e))
+
+        jobs = [(label, self._run_target, {'params': params, 'token': token}) for label, params in targets.items()]
+        summary, errors = self._run_concurrently(jobs, max_workers=len(jobs))
+        summary.update((label, {'failed': True, 'msg': error}) for label, error in errors.items())
+
+        changed = any(result.get('changed') for result in summary.values())
+        failed = sorted(label for label, result in summary.items() if result.get('failed'))
+        if failed:
+            msg = 'Failed to apply to {} of {} targets: {}'.format(len(failed), len(summary), ', '.join(failed))
+            self._fail_json(msg=msg, changed=changed, targets=summary)
+        self._exit_json(changed=changed, targets=summary)
+
+    def _run_target(self, params, token):
+        """ Run the module with the given params, rescoping token, and return what it exits with
+        """
+        try:
+            type(self)(_TargetModule(params, self.module.check_mode), token).run()
+        except _TargetExit as e:
+            return e.result
+        raise Exception('Module exited without a result')
+
+    def _run_concurrently(self, jobs, max_workers=None):
+        """ Call each (key, function, kwargs) job on a pool of threads sharing the session
+            The pool has max_workers threads, by default the max_workers param. Returns a dict of key to the result
+            of each job which succeeded, and a dict of key to error message for each job which raised. A failed job
+            does not stop the others.
+        """
+        results, errors = {}, {}
+        if not jobs:
+            return results, errors
+
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+        with ThreadPoolExecutor(max_workers=max_workers or self.module.params['max_workers']) as executor:
+            futures = dict((executor.submit(self._profiled(function), **kwargs), key) for key, function, kwargs in jobs)
+            for future in as_completed(futures):
+                try:
+                    results[futures[future]] = future.result()
+                except Exception as e:
+                    errors[futures[future]] = str(e)
+        return results, errors
+
+    def _reconcile(self, path, desired, fingerprint, create, update, delete, prune_prefix=None,
+                   desired_fingerprint=None, replace=None, replace_error=None):
+        """ Bring a Monasca API collection in line with desired, an iterable of kwargs for create each including a
+            name. desired is iterated once per plan and only the kwargs of the changes are kept.
+            The collection is listed once. With state=absent the desired entries which exist are deleted. Otherwise
+            missing entries are created, entries whose fingerprint differs are updated and, if prune_prefix is not
+            None, any other entries whose names start with it are deleted. The changes are applied concurrently, or
+            only planned in check mode. update and delete are called with the entry id followed by the kwargs.
+            desired_fingerprint, if given, is used instead of fingerprint for the desired kwargs. replace, if given, is
+            called with the existing and desired fingerprints of an entry to update and returns whether the entry
+            must be deleted and created again instead, for fields which the API does not allow to change. With
+            replace_error given those entries are left unchanged and replace_error is their error message instead.
+            Returns a dict of the ids of the desired entries by name, the names created, updated, replaced and
+            deleted and a dict of error messages by name for the changes which failed.
+            With snapshot_ttl set the changes are planned from a valid snapshot of the collection, which is enough
+            in check mode or when there are none; otherwise the collection is listed again before applying them.
+            With a cache_dir the plan and the progress of applying it are journaled, and a run with the same params
+            after one which did not finish resumes its plan rather than listing the collection, see _resume.
+        """
+        journal = self._journal(path)
+        resumed = journal.load() if journal is not None else None
+        rejected = {}
+        if resumed is not None:
+            ids, plan, done = self._resume(path, fingerprint, *resumed)
+        else:
+            existing, from_snapshot = self._snapshot_index(path, fingerprint)
+            ids, plan = self._plan(existing, desired, desired_fingerprint or fingerprint, prune_prefix, replace)
+            if plan and from_snapshot and not self.module.check_mode:
+                existing, _ = self._snapshot_index(path, fingerprint, live=True)
+                ids, plan = self._plan(existing, desired, desired_fingerprint or fingerprint, prune_prefix, replace)
+            done = {}
+            if replace_error is not None:
+                rejected = dict((change['name'], replace_error) for change in plan if change['action'] == 'replace')
+                plan = [change for change in plan if change['action'] != 'replace']
+            if plan and journal is not None:
+                journal.begin(ids, plan)
+
+        errors = {}
+        applied = set(done)
+        if plan and not self.module.check_mode:
+            functions = {'create': create, 'update': update, 'delete': delete,
+                         'replace': functools.partial(self._replace, create, delete)}
+            jobs = [(change['name'], self._journaled(journal, change, functions[change['action']]), change['kwargs'])
+                    for change in plan if change['name'] not in done]
+            results, errors = self._run_concurrently(jobs)
+            self._invalidate_snapshot(path)
+            done.update(results)
+            applied.update(results)
+            ids.update((name, entry_id) for name, entry_id in done.items() if entry_id is not None)
+            if journal is not None and not errors:
+                journal.finish()
+
+        errors.update(rejected)
+        changes = dict((action, []) for action in ('create', 'update', 'replace', 'delete'))
+        for change in plan:
+            if self.module.check_mode or change['name'] in applied:
+                changes[change['action']].append(change['name'])
+        return {'ids': ids, 'created': changes['create'], 'updated': changes['update'],
+                'replaced': changes['replace'], 'deleted': changes['delete'], 'errors': errors}
+
+    @staticmethod
+    def _replace(create, delete, entry_id, **kwargs):
+        """ Delete the entry with entry_id and create it again from kwargs, returning the new id
+        """
+        delete(entry_id)
+        return create(**kwargs)
+
+    def _plan(self, existing, desired, fingerprint, prune_prefix, replace=None):
+        """ Return the ids of the existing desired entries by name and the plan of changes for _reconcile, a list of
+            dicts of the action (create, update, replace or delete), name, id, fingerprint and kwargs of each change
+        """
+        ids = {}
+        plan = []
+
+        if self.module.params['state'] == 'absent':
+            for kwargs in desired:
+                name = kwargs['name']
+                if name in existing:
+                    plan.append(_change('delete', name, *existing[name]))
+
+        else:  # Only other option is state=present
+            desired_names = set()
+            for kwargs in desired:
+                name = kwargs['name']
+                desired_names.add(name)
+                if name not in existing:
+                    plan.append(_change('create', name, None, fingerprint(kwargs), kwargs))
+                    continue
+                entry_id, current_fingerprint = existing[name]
+                ids[name] = entry_id
+                desired_fingerprint = fingerprint(kwargs)
+                if current_fingerprint != desired_fingerprint:
+                    action = 'replace' if replace is not None and replace(current_fingerprint, desired_fingerprint) \
+                        else 'update'
+                    plan.append(_change(action, name, entry_id, desired_fingerprint, kwargs))
+
+            if prune_prefix is not None:
+                for name, (entry_id, current_fingerprint) in sorted(existing.items()):
+                    if name.startswith(prune_prefix) and name not in desired_names:
+                        plan.append(_change('delete', name, entry_id, current_fingerprint))
+
+        return ids, plan
+
+    def _resume(self, path, fingerprint, ids, plan, done, touched):
+        """ Return the ids, plan and done changes of an interrupted run from its journal for _reconcile
+            Only the changes which were started but not recorded as done are checked against the API: those found
+            applied are added to done, creates of entries which exist are turned into updates, and replaces of
+            entries which were deleted but not created again are turned into creates.
+        """
+        self.exit_data['journal_resumed'] = True
+        for change in plan:
+            if change['name'] not in touched:
+                continue
+            element = self._find(path, change['name'])
+            if change['action'] == 'delete':
+                if element is None:
+                    done[change['name']] = None
+            elif element is not None:
+                if fingerprint(element) == change['fingerprint']:
+                    done[change['name']] = element['id']
+                elif change['action'] == 'create':
+                    change.update(action='update', id=element['id'])
+            elif change['action'] == 'replace':
+                change.update(action='create', id=None)
+        return ids, plan, done
+
+    @staticmethod
+    def _journaled(journal, change, function):
+        """ Return a job applying a change with function, recording in journal when it starts and is done
+        """
+        if change['id'] is not None:
+            function = functools.partial(function, change['id'])
+        if journal is None:
+            return function
+
+        def journaled(**kwargs):
+            journal.append(start=change['name'])
+            result = function(**kwargs)
+            journal.append(done=change['name'], id=result)
+            return result
+        return journaled
+
+    def _journal(self, path):
+        """ Return the _Journal of the changes to a Monasca API collection, or None without a cache_dir or in check
+            mode. A journal is only resumed by a run with the same params.
+        """
+        if self.module.params['cache_dir'] is None or self.module.check_mode:
+            return None
+        name = 'journal-' + hashlib.sha256(self._snapshot_cache_key(path).encode('utf-8')).hexdigest()[:16]
+        return _Journal(self._cache_path(name + '.jsonl'), self._cache_key(*sorted(self.module.params)))
+
+    def _snapshot_index(self, path, fingerprint, live=False):
+        """ Return the _index of a Monasca API collection and whether it came from the snapshot cache
+            When snapshot_ttl is set the index is saved in the cache_dir with a fingerprint of the most recently
+            updated element of the collection, and is reused until it expires as long as that is unchanged. live, or
+            the snapshot_refresh param, lists the collection regardless.
+        """
+        if self.snapshot_cache is None:
+            return self._index(path, fingerprint), False
+
+        cache_key = self._snapshot_cache_key(path)
+        newest = self._newest(path)
+        if not live and not self.module.params['snapshot_refresh'] and newest is not None:
+            snapshot = self.snapshot_cache.get(cache_key)
+            if snapshot is not None and snapshot['newest'] == newest:
+                self.exit_data['snapshot_hit'] = True
+                return dict((name, tuple(entry)) for name, entry in snapshot['index'].items()), True
+
+        self.exit_data['snapshot_hit'] = False
+        index = self._index(path, fingerprint)
+        if newest is not None:
+            self.snapshot_cache.set(cache_key, {'newest': newest, 'index': index},
+                                    time.time() + self.module.params['snapshot_ttl'])
+        return index, False
+
+    def _newest(self, path):
+        """ Return a fingerprint of the most recently updated element of a Monasca API collection, '' if it is empty
+            or None if the API does not sort the collection by updated_at
+            The Monasca API sorts by updated_at without returning it, so the whole element is fingerprinted: a
+            change to another element makes that one the newest, and a change to the newest changes its fields.
+        """
+        try:
+            page = self._get_collection(path, {'sort_by': 'updated_at desc', 'limit': 1})
+        except self.clients.BadRequest:
+            return None
+        return ''.join(fingerprint(dict((name, value) for name, value in element.items() if name != 'links'))
+                       for element in page['elements'][:1])
+
+    def _invalidate_snapshot(self, path):
+        """ Discard the snapshot of a Monasca API collection after changing it
+        """
+        if self.snapshot_cache is not None:
+            self.snapshot_cache.delete(self._snapshot_cache_key(path))
+
+    def _snapshot_cache_key(self, path):
+        return self._cache_key('keystone_url', 'keystone_project', 'project_domain_id', 'monasca_api_url',
+                               'monasca_endpoint_region') + path + '#{}'.format(FINGERPRINT_VERSION)
+
+    def _resolve_notifications(self, actions):
+        """ Return a list of notification method ids for actions, a list of notification method ids or names
+            Names are resolved from one listing of the notification methods per invocation, which is cached in the
+            cache_dir for notification_cache_ttl seconds when set. In check mode names of notification methods which
+            do not exist yet are returned unresolved.
+        """
+        resolved = []
+        for action in actions:
+            if NOTIFICATION_ID.match(action):
+                resolved.append(action)
+                continue
+
+            if self.notification_ids is None:
+                self._load_notification_ids(use_cache=True)
+            if action not in self.notification_ids and self.notification_cached:
+                # The cached ids may predate the notification method, so list them again
+                self._load_notification_ids(use_cache=False)
+            if action in self.notification_ids:
+                resolved.append(self.notification_ids[action])
+            elif self.module.check_mode:
+                resolved.append(action)
+            else:
+                self._fail_json(msg='Unknown notification method: {}'.format(action))
+        return resolved
+
+    def _load_notification_ids(self, use_cache):
+        """ Set notification_ids to a dict of notification method name to id, from the cache if use_cache is true
+        """
+        cache_key = self._notification_cache_key()
+        self.notification_cached = False
+        if self.notification_cache is not None and use_cache:
+            self.notification_ids = self.notification_cache.get(cache_key)
+            if self.notification_ids is not None:
+                self.notification_cached = True
+                return
+
+        self.notification_ids = dict((name, entry_id) for name, (entry_id, _)
+                                     in self._index('/notification-methods', lambda notification: None).items())
+        if self.notification_cache is not None:
+            self.notification_cache.set(cache_key, self.notification_ids,
+                                        time.time() + self.module.params['notification_cache_ttl'])
+
+    def _invalidate_notification_ids(self):
+        """ Forget the cached notification method ids and snapshot after a notification method has been changed
+        """
+        self.notification_ids = None
+        if self.notification_cache is not None:
+            self.notification_cache.delete(self._notification_cache_key())
+        self._invalidate_snapshot('/notification-methods')
+
+    def _notification_cache_key(self):
+        return self._cache_key('keystone_url', 'keystone_project', 'project_domain_id', 'monasca_api_url',
+                               'monasca_endpoint_region')
+
+    def _find(self, path, name):
+        """ Return the element of a Monasca API collection with the given name, or None
+            The collection is filtered by name on the server. If the API ignores the filter every page is scanned,
+            and if it rejects the filter the collection is scanned without it.
+        """
+        try:
+            return self._find_in(self._paginate(path, name=name), name)
+        except self.clients.BadRequest:
+            return self._find_in(self._paginate(path), name)
+
+    @staticmethod
+    def _find_in(elements, name):
+        for element in elements:
+            if element['name'] == name:
+                return element
+        return None
+
+    def _index(self, path, fingerprint):
+        """ Return a dict of name to (id, fingerprint(element)) for every element of a Monasca API collection
+            Only the index is kept in memory, not the elements themselves.
+        """
+        return dict((element['name'], (element['id'], fingerprint(element))) for element in self._paginate(path))
+
+    def _paginate(self, path, **params):
+        """ Yield each element of a Monasca API collection, fetching one page at a time
+        """
+        for page in self._pages(path, **params):
+            for element in page['elements']:
+                yield element
+
+    def _pages(self, path, **params):
+        """ Yield each page of a Monasca API collection, following the next links between pages
+        """
+        if self.module.params['page_size'] is not None:
+            params['limit'] = self.module.params['page_size']
+        page = self._get_collection(path, params)
+        while True:
+            yield page
+            url = next((link['href'] for link in page.get('links', []) if link['rel'] == 'next'), None)
+            if url is None:
+                break
+            with self.instruments.phase('list'):
+                page = self._call(self.session.get, url).json()
+
+    def _get_collection(self, path, params):
+        """ Return the first page of a Monasca API collection
+            If the Monasca API URL came from the endpoint cache and cannot be reached or does not have the
+            collection, the cached URL is deleted and discovered again once. Fails if the API still cannot be
+            reached.
+        """
+        for attempt in range(2):
+            try:
+                with self.instruments.phase('list'):
+                    return self._call(self.session.get, self.api_url.rstrip('/') + path, params=params).json()
+            except Exception as e:
+                if not isinstance(e, self.clients.ConnectionError) and getattr(e, 'http_status', None) != 404:
+                    raise
+                error = e
+            if not self.exit_data.get('endpoint_cache_hit') or attempt:
+                break
+            self._invalidate_endpoint(self.endpoint_cache_key)
+            self.api_url = self._endpoint_discover(self.session)
+            self.exit_data['monasca_api_url'] = self.api_url
+            self.monasca = self.clients.Client(api_version=self.api_version, endpoint=self.api_url,
+                                               session=self.session)
+
+        if self.module.params['monasca_api_url'] is None:
+            self._invalidate_endpoint(self.endpoint_cache_key)
+        self._fail_json(msg='Error calling the Monasca API at {}: {}'.format(self.api_url, error))
+
+    def _record_response(self, response, *args, **kwargs):
+        """ Record a response in the API call statistics, as a requests response hook
+        """
+        self.instruments.record(response)
+        return response
+
+    def _invalidate_endpoint(self, cache_key):
+        """ Remove a Monasca API URL from the endpoint cache after discovery has failed
+        """
+        if self.endpoint_cache is not None:
+            self.endpoint_cache.delete(cache_key)
+
+
+class _TargetExit(Exception):
+    def __init__(self, result):
+        super(_TargetExit, self).__init__(result.get('msg'))
+        self.result = result
+
+
+class _TargetModule(object):
+    """ The parts of AnsibleModule used by MonascaAnsible, for running a module for one of its targets
+    """
+    def __init__(self, params, check_mode):
+        self.params = params
+        self.check_mode = check_mode
+
+    def exit_json(self, **kwargs):
+        raise _TargetExit(kwargs)
+
+    def fail_json(self, msg, **kwargs):
+        kwargs.update(failed=True, msg=msg)
+        raise _TargetExit(kwargs)
+
+
+class _Instruments(object):
+    """ Counts, bytes and latency histograms of HTTP calls by phase
+        Calls to Keystone are in the auth phase, calls made within phase() are in the named phase and any others
+        are in the create, update or delete phase by their HTTP method.
+    """
+    WRITE_PHASES = {'POST': 'create', 'PATCH': 'update', 'PUT': 'update', 'DELETE': 'delete'}
+
+    def __init__(self, keystone_url):
+        self.keystone_url = keystone_url.rstrip('/')
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.phases = {}
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        previous = getattr(self.local, 'phase', None)
+        self.local.phase = name
+        try:
+            yield
+        finally:
+            self.local.phase = previous
+
+    def record(self, response):
+        request = response.request
+        if request.url.startswith(self.keystone_url):
+            name = 'auth'
+        else:
+            name = getattr(self.local, 'phase', None) or self.WRITE_PHASES.get(request.method, 'other')
+        body = request.body or b''
+        seconds = response.elapsed.total_seconds()
+        bucket = next((str(bound) for bound in LATENCY_BUCKETS if seconds <= bound), 'inf')
+
+        with self.lock:
+            phase = self.phases.setdefault(name, {'calls': 0, 'errors': 0, 'bytes_sent': 0, 'bytes_received': 0,
+                                                  'seconds': 0.0, 'latency': {}})
+            phase['calls'] += 1
+            phase['errors'] += 1 if response.status_code >= 400 else 0
+            phase['bytes_sent'] += len(body)
+            phase['bytes_received'] += len(response.content)
+            phase['seconds'] += seconds
+            phase['latency'][bucket] = phase['latency'].get(bucket, 0) + 1
+
+    def stats(self):
+        with self.lock:
+            return dict((name, dict(phase, seconds=round(phase['seconds'], 3), latency=dict(phase['latency'])))
+                        for name, phase in self.phases.items())
+
+
+class _AdaptiveLimiter(object):
+    """ A context manager bounding the number of concurrent API calls
+        The bound starts at maximum, is halved each time the API throttles a call and grows by one after as many
+        successful calls as the current bound, up to maximum again.
+    """
+    def __init__(self, maximum):
+        self.maximum = maximum
+        self.limit = maximum
+        self.active = 0
+        self.successes = 0
+        self.retries = 0
+        self.throttled_seconds = 0.0
+        self.condition = threading.Condition()
+
+    def __enter__(self):
+        with self.condition:
+            while self.active >= self.limit:
+                self.condition.wait()
+            self.active += 1
+
+    def __exit__(self, *exc_info):
+        with self.condition:
+            self.active -= 1
+            self.condition.notify_all()
+
+    def succeeded(self):
+        with self.condition:
+            self.successes += 1
+            if self.successes >= self.limit:
+                self.limit = min(self.maximum, self.limit + 1)
+                self.successes = 0
+                self.condition.notify_all()
+
+    def throttled(self, delay):
+        with self.condition:
+            self.limit = max(1, self.limit // 2)
+            self.successes = 0
+            self.retries += 1
+            self.throttled_seconds += delay
+
+    def stats(self):
+        return {'api_retries': self.retries, 'api_throttled_seconds': round(self.throttled_seconds, 3)}
+
+
+def _retry_after(exception):
+    """ Return the seconds to wait given by the Retry-After header of an HTTP error, or None
+    """
+    response = getattr(exception, 'response', None)
+    value = response.headers.get('Retry-After') if response is not None else None
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        date = email.utils.parsedate_tz(value)
+        return None if date is None else max(0.0, email.utils.mktime_tz(date) - time.time())
+
+
+class _FileCache(object):
+    """ A JSON file of expiring entries shared between module invocations
+        Readers take a shared lock and writers an exclusive lock on a sidecar lock file. Entries may hold
+        Keystone tokens so the file is only readable by its owner.
+    """
+    def __init__(self, path):
+        self.path = path
+
+    def get(self, key):
+        """ Return the value for key, or None if it is missing or expired
+        """
+        with self._lock(fcntl.LOCK_SH):
+            entry = self._read().get(key)
+        if entry is None or entry['expires'] < time.time():
+            return None
+        return entry['value']
+
+    def set(self, key, value, expires):
+        """ Store value for key until the expires timestamp
+        """
+        self._update(key, {'expires': expires, 'value': value})
+
+    def delete(self, key):
+        self._update(key, None)
+
+    @contextlib.contextmanager
+    def _lock(self, operation):
+        fd = os.open(self.path + '.lock', os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, operation)
+            yield
+        finally:
+            os.close(fd)
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return {}
+
+    def _update(self, key, entry):
+        with self._lock(fcntl.LOCK_EX):
+            now = time.time()
+            entries = dict((k, v) for k, v in self._read().items() if k != key and v['expires'] >= now)
+            if entry is not None:
+                entries[key] = entry
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path))
+            with os.fdopen(fd, 'w') as f:
+                json.dump(entries, f)
+            os.rename(tmp_path, self.path)
+
+
+class _Journal(object):
+    """ An append-only file of JSON lines holding a plan of changes followed by a record of each change started
+        and done, so that a run which is interrupted can be resumed. The first line holds the key of the params the
+        plan was made for, and the journal is removed once every change has been applied.
+    """
+    def __init__(self, path, key):
+        self.path = path
+        self.key = key
+        self.lock = threading.Lock()
+
+    def load(self):
+        """ Return the (ids, plan, done, touched) of an unfinished journal with the same key made within
+            JOURNAL_MAX_AGE, or None. done is a dict of the names of the changes done to their result and touched
+            the set of names of the changes started but not done.
+        """
+        records = []
+        try:
+            with open(self.path) as f:
+                for line in f:
+                    records.append(json.loads(line))
+        except ValueError:
+            pass  # The line being written when the run was interrupted
+        except (IOError, OSError):
+            return None
+        if not records or records[0].get('key') != self.key or records[0]['time'] < time.time() - JOURNAL_MAX_AGE:
+            return None
+
+        done = {}
+        started = set()
+        for record in records[1:]:
+            if 'start' in record:
+                started.add(record['start'])
+            elif 'done' in record:
+                done[record['done']] = record['id']
+        return records[0]['ids'], records[0]['plan'], done, started - set(done)
+
+    def begin(self, ids, plan):
+        """ Start a new journal with a plan, replacing any previous one
+        """
+        fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            f.write(json.dumps({'key': self.key, 'time': time.time(), 'ids': ids, 'plan': plan}) + '\n')
+
+    def append(self, **record):
+        line = (json.dumps(record) + '\n').encode('utf-8')
+        with self.lock:
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND)
+            try:
+                os.write(fd, line)
+            finally:
+                os.close(fd)
+
+    def finish(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def _change(action, name, entry_id, fingerprint, kwargs=None):
+    """ Return a change of a plan, see MonascaAnsible._plan
+    """
+    return {'action': action, 'name': name, 'id': entry_id, 'fingerprint': fingerprint, 'kwargs': kwargs or {}}
+
+
+def _client_classes(http_client):
+    """ Return the _ClientClasses for the http_client param
+        They are only imported when first needed, as python-monascaclient and keystoneauth1 take much longer to import
+        than the rest of the module. Raises ImportError if they are not installed.
+    """
+    if http_client == 'requests':
+        from ansible.module_utils import monasca_rest
+        return _ClientClasses(monasca_rest.Password, monasca_rest.Token, monasca_rest.Session,
+                              monasca_rest.TCPKeepAliveAdapter, monasca_rest.Client, monasca_rest.BadRequest,
+                              monasca_rest.ConnectionError)
+
+    from keystoneauth1 import exceptions
+    from keystoneauth1 import identity
+    from keystoneauth1 import session
+    from monascaclient import client
+    return _ClientClasses(identity.Password, identity.Token, session.Session, session.TCPKeepAliveAdapter,
+                          client.Client, exceptions.BadRequest, exceptions.ConnectionError)
+
+
+def fingerprint(*values):
+    """ Return a digest of the JSON encoding of values, for cheaply comparing desired and existing entries
+    """
+    return hashlib.sha1(json.dumps(values, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def definition_fingerprint(definition):
+    """ Return a fingerprint of the fields of an alarm definition which the modules manage
+        The fields are normalised so that an existing alarm definition has the same fingerprint as the desired one
+        when they differ only in the order of match_by or of actions, the case of severity or the formatting of the
+        expression, see normalise_expression. match_by is fingerprinted separately for definition_replaced.
+    """
+    expression = definition.get('expression') or ''
+    try:
+        expression = normalise_expression(expression)
+    except ExpressionError:
+        # Leave expressions the parser does not understand to the Monasca API
+        expression = ' '.join(expression.split())
+    return fingerprint(sorted(set(definition.get('match_by') or []))) + ':' + fingerprint(
+        definition.get('description') or '',
+        expression,
+        (definition.get('severity') or 'LOW').upper(),
+        *[sorted(set(definition.get(action) or [])) for action in DEFINITION_ACTIONS]
+    )
+
+
+def definition_replaced(current, desired):
+    """ Return whether an alarm definition must be deleted and created again to change it from the current to the
+        desired definition_fingerprint, as the Monasca API rejects any change to match_by
+    """
+    return current.split(':')[0] != desired.split(':')[0]
+
+
+def notification_fingerprint(notification):
+    """ Return a fingerprint of the fields of a notification method which the modules manage
+    """
+    return fingerprint((notification.get('type') or '').upper(), notification.get('address'))
+
+
+def expression_errors(definitions):
+    """ Return a dict of name to error message for each of a list of alarm definitions with a missing or invalid
+        expression, so that a whole catalog can be checked before authenticating
+    """
+    errors = {}
+    for definition in definitions:
+        if not definition['expression']:
+            errors[definition['name']] = 'expression is required'
+            continue
+        try:
+            normalise_expression(definition['expression'])
+        except ExpressionError as e:
+            errors[definition['name']] = 'Invalid expression {!r}: {}'.format(definition['expression'], e)
+    return errors
+
+
+def expand_template(template):
+    """ Yield the alarm definitions of a template, one at a time for each combination of the params in its matrix
+        The matrix is either a dict of param to a list of values, whose every combination is expanded, or a list of
+        dicts of param to value. $param and ${param} in the name, description, expression, match_by and severity of
+        the template are replaced by the values, and $$ by $. Raises KeyError for a param missing from the matrix.
+    """
+    matrix = template['matrix']
+    if isinstance(matrix, dict):
+        params = sorted(matrix)
+        rows = (dict(zip(params, values)) for values in itertools.product(*[
+            matrix[param] if isinstance(matrix[param], list) else [matrix[param]] for param in params]))
+    else:
+        rows = iter(matrix)
+
+    for row in rows:
+        values = dict((param, str(value)) for param, value in row.items())
+        definition = dict((field, string.Template(template[field]).substitute(values))
+                          for field in ('name', 'description', 'expression', 'severity'))
+        definition['match_by'] = [string.Template(item).substitute(values) for item in template['match_by']]
+        for action in DEFINITION_ACTIONS:
+            definition[action] = template[action]
+        yield definition
+
 
 def argument_spec():
     return dict(
+            api_retries=dict(required=False, default=5, type='int'),
             api_version=dict(required=False, default='2_0', type='str'),
+            cache_dir=dict(required=False, type='path'),
+            endpoint_cache_ttl=dict(required=False, default=3600, type='int'),
+            http_client=dict(required=False, default='monascaclient', choices=['monascaclient', 'requests'],
+                             type='str'),
+            http_pool_size=dict(required=False, type='int'),
             keystone_user=dict(required=False, type='str'),
             keystone_password=dict(required=False, no_log=True, type='str'),
             keystone_token=dict(required=False, no_log=True, type='str'),
@@ -174,6 +1225,23 @@ def argument_spec():
             project_domain_id=dict(required=False, default='default', type='str'),
             monasca_endpoint_region=dict(required=False, default='RegionOne', type='str'),
             monasca_endpoint_interface=dict(required=False, default=['admin', 'internal'], type='list'),
+            max_workers=dict(required=False, default=4, type='int'),
+            notification_cache_ttl=dict(required=False, default=300, type='int'),
+            page_size=dict(required=False, type='int'),
+            snapshot_refresh=dict(required=False, default=False, type='bool'),
+            snapshot_ttl=dict(required=False, default=0, type='int'),
+        )
+
+
+def target_argument_spec():
+    """ Return the argument spec of the targets param, for modules which support _run_targets
+    """
+    return dict(
+            targets=dict(required=False, type='list', elements='dict', options=dict(
+                keystone_project=dict(required=False, type='str'),
+                monasca_api_url=dict(required=False, type='str'),
+                monasca_endpoint_region=dict(required=False, type='str'),
+            )),
         )
 
 
@@ -0,0 +1,251 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# (C) Copyright 2020 StackHPC Ltd.
+
+""" A parser for Monasca alarm expressions, for validating them without a round trip to the Monasca API
+
+    expression    := and_expression {( "or" | "||" ) and_expression}
+    and_expression := primary {( "and" | "&&" ) primary}
+    primary       := "(" expression ")" | subexpression
+    subexpression := [function "("] metric [, "deterministic"] [, period] [")"] comparator threshold ["times" periods]
+    metric        := name ["{" name "=" value {"," name "=" value} "}"]
+    function      := "min" | "max" | "sum" | "count" | "avg" | "last"
+    comparator    := "<" | "lt" | "<=" | "lte" | ">" | "gt" | ">=" | "gte"
+
+    Keywords are case insensitive and "and" binds more tightly than "or", as in the Monasca API.
+"""
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import re
+
+FUNCTIONS = ('min', 'max', 'sum', 'count', 'avg', 'last')
+COMPARATORS = {'<': '<', 'lt': '<', '<=': '<=', 'lte': '<=', '>': '>', 'gt': '>', '>=': '>=', 'gte': '>='}
+LOGICAL_OPERATORS = {'and': 'and', '&&': 'and', 'or': 'or', '||': 'or'}
+DEFAULT_PERIOD = 60
+DEFAULT_PERIODS = 1
+
+_TOKEN = re.compile(r'\s*(?:(<=|>=|&&|\|\||[<>(){},=])|([^\s<>(){},="&|]+))')
+_NAME = re.compile(r'^[^\s<>(){},="&|]+$')
+_NUMBER = re.compile(r'^[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?$')
+
+# Normalised expressions, or the ExpressionError raised parsing them, by expression. Catalogs repeat the same
+# expressions across invocations and fingerprints of existing alarm definitions, so each is only parsed once.
+_NORMALISED = {}
+
+
+class ExpressionError(ValueError):
+    """ An alarm expression which does not match the Monasca alarm expression grammar
+    """
+
+
+def normalise_expression(expression):
+    """ Return a canonical form of an alarm expression, raising ExpressionError if it is invalid
+        Expressions which differ only in whitespace, the case of keywords, the spelling of comparators and logical
+        operators, the order of dimensions or of the operands of "and" and "or", redundant parentheses, the default
+        period and periods, or the formatting of thresholds have the same canonical form.
+    """
+    result = _NORMALISED.get(expression)
+    if result is None:
+        try:
+            result = _Parser(expression).parse()
+        except ExpressionError as e:
+            result = e
+        _NORMALISED[expression] = result
+    if isinstance(result, ExpressionError):
+        raise result
+    return result
+
+
+def _tokenize(expression):
+    """ Return a list of (position, token) for an expression
+    """
+    tokens = []
+    position = 0
+    expression = expression.rstrip()
+    while position < len(expression):
+        match = _TOKEN.match(expression, position)
+        if match is None:
+            raise ExpressionError('Unexpected character {!r} at position {}'.format(
+                expression[position:].lstrip()[:1], len(expression) - len(expression[position:].lstrip())))
+        tokens.append((match.start(match.lastindex), match.group(match.lastindex)))
+        position = match.end()
+    return tokens
+
+
+def _number(value):
+    """ Return the canonical text of a threshold
+    """
+    text = repr(float(value))
+    return text[:-2] if text.endswith('.0') else text
+
+
+class _Parser(object):
+    """ A recursive descent parser returning the canonical form of one alarm expression
+    """
+    def __init__(self, expression):
+        self.tokens = _tokenize(expression)
+        self.position = 0
+
+    def parse(self):
+        if not self.tokens:
+            raise ExpressionError('Empty expression')
+        operator, operands = self._expression()
+        if self.position < len(self.tokens):
+            self._error('Unexpected {!r}')
+        return self._format(operator, operands)
+
+    def _peek(self, offset=0):
+        index = self.position + offset
+        return self.tokens[index][1] if index < len(self.tokens) else None
+
+    def _keyword(self, offset=0):
+        token = self._peek(offset)
+        return token.lower() if token is not None else None
+
+    def _next(self, expected):
+        token = self._peek()
+        if token is None:
+            raise ExpressionError('Expected {} at end of expression'.format(expected))
+        self.position += 1
+        return token
+
+    def _expect(self, token):
+        if self._next(repr(token)) != token:
+            self.position -= 1
+            self._error('Expected {!r} but found {!r}', token)
+
+    def _error(self, template, *args):
+        """ Raise an ExpressionError of template formatted with args followed by the token at the current position
+        """
+        if self.position >= len(self.tokens):
+            raise ExpressionError('Unexpected end of expression')
+        position, token = self.tokens[self.position]
+        raise ExpressionError('{} at position {}'.format(template.format(*(args + (token,))), position))
+
+    # Logical expressions are (operator, operands) with operator None for a single subexpression, whose operands
+    # are then its canonical text
+
+    def _expression(self):
+        return self._logical('or', self._and_expression)
+
+    def _and_expression(self):
+        return self._logical('and', self._primary)
+
+    def _logical(self, operator, operand):
+        operands = []
+        while True:
+            inner_operator, inner_operands = operand()
+            # Flatten operands combined with the same operator, such as (a and b) and c
+            if inner_operator == operator:
+                operands.extend(inner_operands)
+            else:
+                operands.append(self._format(inner_operator, inner_operands, operator))
+            if LOGICAL_OPERATORS.get(self._keyword()) != operator:
+                break
+            self.position += 1
+        if len(operands) == 1:
+            return inner_operator, inner_operands
+        return operator, sorted(operands)
+
+    def _primary(self):
+        if self._peek() == '(':
+            self.position += 1
+            result = self._expression()
+            self._expect(')')
+            return result
+        return None, self._subexpression()
+
+    def _format(self, operator, operands, outer_operator=None):
+        if operator is None:
+            return operands
+        text = (' ' + operator + ' ').join(operands)
+        # "or" only needs parentheses within "and", which binds more tightly
+        return '(' + text + ')' if operator == 'or' and outer_operator == 'and' else text
+
+    def _subexpression(self):
+        function = None
+        deterministic = False
+        period = None
+        if self._keyword() in FUNCTIONS and self._peek(1) == '(':
+            function = self._keyword()
+            self.position += 2
+            metric = self._metric()
+            while self._peek() == ',':
+                self.position += 1
+                if self._keyword() == 'deterministic' and not deterministic:
+                    deterministic = True
+                    self.position += 1
+                elif period is None:
+                    period = self._integer('a period')
+                else:
+                    self._error('Unexpected {!r}')
+            self._expect(')')
+        else:
+            metric = self._metric()
+
+        token = self._next('a comparator')
+        comparator = COMPARATORS.get(token.lower())
+        if comparator is None:
+            self.position -= 1
+            self._error('Expected a comparator but found {!r}')
+
+        token = self._next('a threshold')
+        if not _NUMBER.match(token):
+            self.position -= 1
+            self._error('Expected a numeric threshold but found {!r}')
+        threshold = _number(token)
+
+        periods = None
+        if self._keyword() == 'times':
+            self.position += 1
+            periods = self._integer('a number of periods')
+
+        text = metric
+        if function is not None:
+            arguments = [metric]
+            if deterministic:
+                arguments.append('deterministic')
+            if period not in (None, DEFAULT_PERIOD):
+                arguments.append(str(period))
+            text = '{}({})'.format(function, ', '.join(arguments))
+        text = '{} {} {}'.format(text, comparator, threshold)
+        if periods not in (None, DEFAULT_PERIODS):
+            text += ' times {}'.format(periods)
+        return text
+
+    def _metric(self):
+        name = self._name('a metric name')
+        if self._peek() != '{':
+            return name
+        self.position += 1
+        dimensions = {}
+        while True:
+            key = self._name('a dimension name')
+            self._expect('=')
+            value = self._name('a dimension value')
+            if key in dimensions:
+                self.position -= 3
+                self._error('Duplicate dimension {!r}')
+            dimensions[key] = value
+            if self._peek() != ',':
+                break
+            self.position += 1
+        self._expect('}')
+        return '{}{{{}}}'.format(name, ','.join('{}={}'.format(key, dimensions[key]) for key in sorted(dimensions)))
+
+    def _name(self, expected):
+        token = self._next(expected)
+        if not _NAME.match(token):
+            self.position -= 1
+            self._error('Expected {} but found {!r}', expected)
+        return token
+
+    def _integer(self, expected):
+        token = self._next(expected)
+        if not token.isdigit() or int(token) < 1:
+            self.position -= 1
+            self._error('Expected {} greater than 0 but found {!r}', expected)
+        return int(token)
@@ -0,0 +1,225 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# (C) Copyright 2020 StackHPC Ltd.
+
+""" A minimal client for the Keystone v3 and Monasca APIs used by the modules, needing only requests
+
+    It mirrors the parts of keystoneauth1 and python-monascaclient which MonascaAnsible uses, so that either can be
+    used through the http_client param, and stores the Keystone token in the same auth state format as keystoneauth1
+    so that the two share the token cache. Importing it takes a fraction of the time python-monascaclient takes.
+"""
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import datetime
+import json
+import re
+import socket
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+
+# Seconds before it expires that a token is replaced, as in keystoneauth1
+STALE_SECONDS = 30
+# A catalog endpoint which already ends with an API version, such as http://monasca:8070/v2.0
+VERSIONED_ENDPOINT = re.compile(r'/v\d+(\.\d+)?/?$')
+
+
+class HttpError(Exception):
+    """ An HTTP error response, with the http_status and response attributes of keystoneauth1's HttpError
+    """
+    def __init__(self, response):
+        super(HttpError, self).__init__('{} {} for {} {}: {}'.format(
+            response.status_code, response.reason, response.request.method, response.url, response.text))
+        self.http_status = response.status_code
+        self.response = response
+
+
+class BadRequest(HttpError):
+    pass
+
+
+# Raised when the API cannot be reached, as keystoneauth1's ConnectionError is
+ConnectionError = requests.exceptions.ConnectionError
+
+
+def _check(response):
+    if response.status_code == 400:
+        raise BadRequest(response)
+    if response.status_code >= 400:
+        raise HttpError(response)
+    return response
+
+
+class TCPKeepAliveAdapter(HTTPAdapter):
+    """ An HTTP adapter which enables TCP keep-alive on its connections, as keystoneauth1's does
+    """
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs.setdefault('socket_options', HTTPConnection.default_socket_options +
+                          [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)])
+        super(TCPKeepAliveAdapter, self).init_poolmanager(*args, **kwargs)
+
+
+class AccessInfo(object):
+    """ A Keystone v3 token and the body of the response which issued it
+    """
+    def __init__(self, auth_token, body):
+        self.auth_token = auth_token
+        self.body = body
+        self.expires = datetime.datetime.strptime(body['token']['expires_at'][:19], '%Y-%m-%dT%H:%M:%S')
+
+    def will_expire_soon(self, seconds):
+        return self.expires - datetime.timedelta(seconds=seconds) <= datetime.datetime.utcnow()
+
+    def endpoint(self, service_type, interface, region_name):
+        """ Return the URL of the first catalog endpoint of service_type in region_name, preferring the interfaces
+            in the order given
+        """
+        interfaces = list(interface) if isinstance(interface, (list, tuple)) else [interface]
+        endpoints = [endpoint for service in self.body['token'].get('catalog', [])
+                     if service['type'] == service_type for endpoint in service['endpoints']
+                     if region_name is None or region_name in (endpoint.get('region'), endpoint.get('region_id'))]
+        for name in interfaces:
+            for endpoint in endpoints:
+                if endpoint['interface'] == name:
+                    return endpoint['url']
+        raise Exception('No {} endpoint for {} in region {} of the service catalog'.format(
+            '/'.join(interfaces), service_type, region_name))
+
+
+class _Identity(object):
+    """ The base of the Keystone v3 auth plugins, which issue and cache a project scoped token
+    """
+    def __init__(self, auth_url, project_name, project_domain_id):
+        self.auth_url = auth_url.rstrip('/')
+        self.project_name = project_name
+        self.project_domain_id = project_domain_id
+        self.auth_ref = None
+        self.lock = threading.Lock()
+
+    def _identity(self):
+        raise NotImplementedError()
+
+    def get_access(self, session):
+        with self.lock:
+            if self.auth_ref is None or self.auth_ref.will_expire_soon(STALE_SECONDS):
+                url = self.auth_url if self.auth_url.endswith('/v3') else self.auth_url + '/v3'
+                body = {'auth': {'identity': self._identity(), 'scope': {'project': {
+                    'name': self.project_name, 'domain': {'id': self.project_domain_id}}}}}
+                response = _check(session.session.post(url + '/auth/tokens', json=body,
+                                                       headers={'Accept': 'application/json'}))
+                self.auth_ref = AccessInfo(response.headers['X-Subject-Token'], response.json())
+            return self.auth_ref
+
+    def get_token(self, session):
+        return self.get_access(session).auth_token
+
+    def invalidate(self):
+        with self.lock:
+            self.auth_ref = None
+
+    def get_auth_state(self):
+        if self.auth_ref is None:
+            return None
+        return json.dumps({'auth_token': self.auth_ref.auth_token, 'body': self.auth_ref.body})
+
+    def set_auth_state(self, data):
+        state = json.loads(data) if data else None
+        self.auth_ref = AccessInfo(state['auth_token'], state['body']) if state else None
+
+
+class Password(_Identity):
+    def __init__(self, auth_url, username, password, project_name, user_domain_id, project_domain_id):
+        super(Password, self).__init__(auth_url, project_name, project_domain_id)
+        self.username = username
+        self.password = password
+        self.user_domain_id = user_domain_id
+
+    def _identity(self):
+        return {'methods': ['password'], 'password': {'user': {
+            'name': self.username, 'password': self.password, 'domain': {'id': self.user_domain_id}}}}
+
+
+class Token(_Identity):
+    def __init__(self, auth_url, token, project_name, project_domain_id):
+        super(Token, self).__init__(auth_url, project_name, project_domain_id)
+        self.token = token
+
+    def _identity(self):
+        return {'methods': ['token'], 'token': {'id': self.token}}
+
+
+class Session(object):
+    """ A requests session which authenticates each request with the token of its auth plugin
+        A request rejected with a 401 response is retried once with a new token. Error responses raise HttpError.
+    """
+    def __init__(self, auth):
+        self.auth = auth
+        self.session = requests.Session()
+
+    def request(self, url, method, endpoint_filter=None, headers=None, **kwargs):
+        if endpoint_filter is not None:
+            access = self.auth.get_access(self)
+            endpoint = access.endpoint(endpoint_filter['service_type'], endpoint_filter['interface'],
+                                       endpoint_filter.get('region_name'))
+            url = _versioned(endpoint, endpoint_filter.get('version')).rstrip('/') + '/' + url.lstrip('/')
+        headers = dict(headers or {}, Accept='application/json')
+        for attempt in range(2):
+            headers['X-Auth-Token'] = self.auth.get_token(self)
+            response = self.session.request(method, url, headers=headers, **kwargs)
+            if response.status_code != 401 or attempt:
+                break
+            self.auth.invalidate()
+        return _check(response)
+
+    def get(self, url, **kwargs):
+        return self.request(url, 'GET', **kwargs)
+
+    def get_token(self):
+        return self.auth.get_token(self)
+
+
+def _versioned(endpoint, version):
+    """ Return a catalog endpoint with version appended unless it already ends with one
+        keystoneauth1 finds the URL of the version through the version discovery document of an unversioned
+        endpoint. The Monasca API serves each version under /v<version>, so that is assumed rather than discovered.
+    """
+    if version is None or VERSIONED_ENDPOINT.search(endpoint):
+        return endpoint
+    return '{}/v{}'.format(endpoint.rstrip('/'), version)
+
+
+class _Manager(object):
+    """ Create, update, patch and delete the elements of a Monasca API collection, as python-monascaclient does
+    """
+    def __init__(self, session, url, id_name):
+        self.session = session
+        self.url = url
+        self.id_name = id_name
+
+    def _element_url(self, kwargs):
+        return '{}/{}'.format(self.url, kwargs.pop(self.id_name))
+
+    def create(self, **kwargs):
+        return self.session.request(self.url, 'POST', json=kwargs).json()
+
+    def update(self, **kwargs):
+        return self.session.request(self._element_url(kwargs), 'PUT', json=kwargs).json()
+
+    def patch(self, **kwargs):
+        return self.session.request(self._element_url(kwargs), 'PATCH', json=kwargs).json()
+
+    def delete(self, **kwargs):
+        return self.session.request(self._element_url(kwargs), 'DELETE')
+
+
+class Client(object):
+    """ The alarm definitions and notification methods of the Monasca API at endpoint
+    """
+    def __init__(self, api_version, endpoint, session):
+        self.alarm_definitions = _Manager(session, endpoint.rstrip('/') + '/alarm-definitions', 'alarm_id')
+        self.notifications = _Manager(session, endpoint.rstrip('/') + '/notification-methods', 'notification_id')
@@ -0,0 +1,248 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# (C) Copyright 2020 StackHPC Ltd.
+
+""" Benchmark the modules against the fake Keystone and Monasca APIs of fake_monasca.py
+
+    Each scenario seeds a project of the fake with a catalog of the given size and then runs a module against it
+    in a forked process, reporting the wall time, the HTTP calls and connections made, the bytes transferred and the
+    growth of the peak resident memory of that process. The fake is served from this process, so its work is not
+    counted against the module. The startup scenario instead runs a no-op module in a new Python interpreter, so
+    that its wall time includes importing the module and its clients as happens for each Ansible task.
+
+    Requires ansible, requests, python-monascaclient and keystoneauth1. For example:
+        python tests/benchmark.py --sizes 10,1000 --latency 0.005 --json results.json
+        python tests/benchmark.py --sizes 100 --scenarios startup --http-client requests
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import argparse
+import importlib.util
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROLE_DIR = os.path.dirname(TESTS_DIR)
+sys.path.insert(0, TESTS_DIR)
+
+from fake_monasca import FakeMonasca  # noqa: E402
+
+SCENARIOS = ('definitions-create', 'definitions-noop', 'definitions-update', 'definition', 'notification', 'startup')
+# The library module and class run by each scenario
+MODULES = {
+    'definitions-create': ('monasca_alarm_definitions', 'MonascaDefinitions'),
+    'definitions-noop': ('monasca_alarm_definitions', 'MonascaDefinitions'),
+    'definitions-update': ('monasca_alarm_definitions', 'MonascaDefinitions'),
+    'definition': ('monasca_alarm_definition', 'MonascaDefinition'),
+    'notification': ('monasca_notification_method', 'MonascaNotification'),
+    'startup': ('monasca_alarm_definitions', 'MonascaDefinitions'),
+}
+
+
+class _Exit(Exception):
+    def __init__(self, result):
+        super(_Exit, self).__init__(result.get('msg'))
+        self.result = result
+
+
+class _BenchModule(object):
+    """ The parts of AnsibleModule used by MonascaAnsible, for running a module in the benchmark process
+    """
+    def __init__(self, params):
+        self.params = params
+        self.check_mode = False
+
+    def exit_json(self, **kwargs):
+        raise _Exit(kwargs)
+
+    def fail_json(self, msg, **kwargs):
+        kwargs.update(failed=True, msg=msg)
+        raise _Exit(kwargs)
+
+
+def _load(name, path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def _library():
+    """ Import the role's module_utils and library modules
+    """
+    for name in ('monasca_expression', 'monasca_rest', 'monasca'):
+        _load('ansible.module_utils.' + name, os.path.join(ROLE_DIR, 'module_utils', name + '.py'))
+    return dict((name, _load(name, os.path.join(ROLE_DIR, 'library', name + '.py')))
+                for name in ('monasca_alarm_definition', 'monasca_alarm_definitions', 'monasca_notification_method'))
+
+
+def _definition(index, threshold=90):
+    return {'name': 'bench-{:05d}'.format(index), 'description': 'Benchmark alarm definition',
+            'expression': 'avg(bench.metric{{index={}}}) > {} times 3'.format(index, threshold),
+            'match_by': ['hostname'], 'severity': 'LOW',
+            'alarm_actions': [], 'ok_actions': [], 'undetermined_actions': []}
+
+
+class Benchmark(object):
+    def __init__(self, fake, args):
+        self.fake = fake
+        self.args = args
+        _library()
+        monasca = sys.modules['ansible.module_utils.monasca']
+        specs = dict(monasca.argument_spec(), **monasca.target_argument_spec())
+        self.defaults = dict((name, spec.get('default')) for name, spec in specs.items())
+
+    def params(self, project, **params):
+        result = dict(self.defaults, keystone_url=self.fake.keystone_url, keystone_user='bench',
+                      keystone_password='bench', keystone_project=project, max_workers=self.args.max_workers,
+                      page_size=self.args.page_size, http_client=self.args.http_client,
+                      http_pool_size=self.args.http_pool_size, state='present')
+        result.update(params)
+        return result
+
+    def prepare(self, scenario, size):
+        """ Seed the fake for a scenario and return the params of the module to run
+        """
+        project = '{}-{}-{}'.format(scenario, size, self.args.http_client)
+        definitions = [_definition(index) for index in range(size)]
+
+        if scenario in ('definitions-create', 'definitions-noop', 'definitions-update', 'startup'):
+            if scenario != 'definitions-create':
+                self.fake.seed(project, 'alarm-definitions', definitions)
+            if scenario == 'definitions-update':
+                definitions = [_definition(index, 80) for index in range(size)]
+            return self.params(project, alarm_definitions=definitions, alarm_definition_templates=None,
+                               alarm_actions=[], ok_actions=[], undetermined_actions=[], prune=False, prune_prefix='',
+                               replace_on_match_by_change=False)
+        if scenario == 'definition':
+            self.fake.seed(project, 'alarm-definitions', definitions)
+            return self.params(project, replace_on_match_by_change=False, **_definition(size // 2, 80))
+        if scenario == 'notification':
+            self.fake.seed(project, 'notification-methods', [
+                {'name': 'bench-{:05d}'.format(index), 'type': 'EMAIL', 'address': 'root@localhost'}
+                for index in range(size)])
+            return self.params(project, name='bench', type='EMAIL', address='root@localhost')
+        raise ValueError('Unknown scenario {}'.format(scenario))
+
+    def run(self, scenario, size):
+        params = self.prepare(scenario, size)
+        self.fake.reset_counters()
+        if scenario == 'startup':
+            result = _in_interpreter(MODULES[scenario], params)
+        else:
+            result = _in_child(MODULES[scenario], params)
+        result.update(scenario=scenario, size=size, calls=dict(self.fake.calls), bytes=dict(self.fake.bytes),
+                      http_calls=sum(self.fake.calls.values()), connections=self.fake.connections)
+        return result
+
+
+def _run_module(module, params):
+    """ Run the (library module, class) module with params and return its wall time, peak memory growth and result
+    """
+    start_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.time()
+    try:
+        cls = getattr(_library()[module[0]], module[1])
+        cls(_BenchModule(params)).run()
+        result = {'failed': True, 'msg': 'Module did not exit'}
+    except _Exit as e:
+        result = e.result
+    except Exception as e:
+        result = {'failed': True, 'msg': repr(e)}
+    return {'wall_seconds': round(time.time() - start, 3),
+            'peak_memory_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - start_rss,
+            'failed': bool(result.get('failed')), 'msg': result.get('msg'),
+            'changed': bool(result.get('changed')), 'api_calls': result.get('api_calls')}
+
+
+def _in_child(module, params):
+    """ Run the module in a forked process, which has already imported it
+    """
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        report = _run_module(module, params)
+        with os.fdopen(write_fd, 'w') as f:
+            json.dump(report, f)
+        os._exit(0)
+
+    os.close(write_fd)
+    with os.fdopen(read_fd) as f:
+        data = f.read()
+    os.waitpid(pid, 0)
+    return json.loads(data)
+
+
+def _in_interpreter(module, params):
+    """ Run the module in a new Python interpreter, timing it from the start of the interpreter
+    """
+    start = time.time()
+    process = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--child'], stdin=subprocess.PIPE,
+                               stdout=subprocess.PIPE, universal_newlines=True)
+    stdout = process.communicate(json.dumps({'module': module, 'params': params}))[0]
+    report = json.loads(stdout)
+    report.update(module_seconds=report['wall_seconds'], wall_seconds=round(time.time() - start, 3))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='10,1000,10000',
+                        help='Comma separated numbers of alarm definitions or notification methods')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                        help='Comma separated scenarios, of {}'.format(', '.join(SCENARIOS)))
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds to delay each request by')
+    parser.add_argument('--throttle-every', type=int, default=0, help='Throttle every nth write with a 429')
+    parser.add_argument('--fake-page-size', type=int, default=1000, help='Maximum page size of the fake')
+    parser.add_argument('--compress', action='store_true', help='Have the fake gzip compress its responses')
+    parser.add_argument('--page-size', type=int, help='page_size param of the modules')
+    parser.add_argument('--max-workers', type=int, default=4, help='max_workers param of the modules')
+    parser.add_argument('--http-pool-size', type=int, help='http_pool_size param of the modules')
+    parser.add_argument('--http-client', default='monascaclient', choices=['monascaclient', 'requests'],
+                        help='http_client param of the modules')
+    parser.add_argument('--json', help='File to write the full results to')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child = json.load(sys.stdin)
+        json.dump(_run_module(child['module'], child['params']), sys.stdout)
+        return 0
+
+    fake = FakeMonasca(latency=args.latency, throttle_every=args.throttle_every,
+                       page_size=args.fake_page_size, compress=args.compress).start()
+    benchmark = Benchmark(fake, args)
+    results = []
+    row = '{:<20} {:>7} {:>10} {:>10} {:>11} {:>10} {:>10} {:>8}  {}'
+    print(row.format('scenario', 'size', 'wall (s)', 'http calls', 'connections', 'wire (KB)', 'peak (KB)', 'changed',
+                     'calls'))
+    try:
+        for size in [int(size) for size in args.sizes.split(',')]:
+            for scenario in args.scenarios.split(','):
+                result = benchmark.run(scenario, size)
+                results.append(result)
+                calls = ', '.join('{} {}'.format(call, count) for call, count in sorted(result['calls'].items()))
+                print(row.format(scenario, size, result['wall_seconds'], result['http_calls'], result['connections'],
+                                 sum(result['bytes'].values()) // 1024,
+                                 result['peak_memory_kb'], str(result['changed']),
+                                 'FAILED: {}'.format(result['msg']) if result['failed'] else calls))
+                sys.stdout.flush()
+    finally:
+        fake.stop()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    return 1 if any(result['failed'] for result in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
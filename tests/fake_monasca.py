@@ -0,0 +1,342 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# (C) Copyright 2020 StackHPC Ltd.
+
+""" An in-process stand-in for the Keystone and Monasca APIs used by the modules, for benchmarks and local runs
+
+    Serves Keystone v3 token issue (password and token methods, with a catalog containing the monitoring service in
+    every region given) and the Monasca v2.0 alarm-definitions and notification-methods collections with offset
+    paging and sort_by. Each Keystone project has its own collections. Latency and 429 responses can be injected,
+    responses can be gzip compressed as by a compressing proxy, and every request and connection is counted.
+
+    Run it standalone with: python fake_monasca.py [--port PORT] [--latency SECONDS] [--throttle-every N] [--compress]
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import argparse
+import collections
+import gzip
+import json
+import threading
+import time
+import uuid
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+COLLECTIONS = {'alarm-definitions': 'definitions', 'notification-methods': 'notifications'}
+# Responses smaller than this are not worth compressing
+COMPRESS_MIN_BYTES = 1024
+DEFINITION_ACTIONS = ('alarm_actions', 'ok_actions', 'undetermined_actions')
+# Columns the collections can be sorted by which, as in the Monasca API, are not returned in the elements
+TIMESTAMPS = ('created_at', 'updated_at')
+
+
+class _Collection(collections.OrderedDict):
+    """ An ordered dict of id to element which also counts the elements by name, for cheap conflict checks
+    """
+    def __init__(self):
+        super(_Collection, self).__init__()
+        self.names = collections.Counter()
+
+    def __setitem__(self, key, element):
+        if key in self:
+            self.names[self[key]['name']] -= 1
+        super(_Collection, self).__setitem__(key, element)
+        self.names[element['name']] += 1
+
+    def __delitem__(self, key):
+        self.names[self[key]['name']] -= 1
+        super(_Collection, self).__delitem__(key)
+
+
+class FakeMonasca(object):
+    """ The state of the fake APIs and the HTTP server serving them
+        latency is the seconds each request is delayed by, throttle_every makes every nth create, update or delete
+        fail with a 429 response, page_size is the maximum number of elements in a page, compress gzip compresses
+        responses for clients which accept it and versioned_catalog includes the API version in the catalog URLs.
+    """
+    def __init__(self, port=0, latency=0.0, throttle_every=0, page_size=10000, regions=('RegionOne',), compress=False,
+                 versioned_catalog=True):
+        self.latency = latency
+        self.versioned_catalog = versioned_catalog
+        self.compress = compress
+        self.throttle_every = throttle_every
+        self.page_size = page_size
+        self.regions = regions
+        self.lock = threading.Lock()
+        self.tokens = {}
+        self.projects = {}
+        self.calls = collections.Counter()
+        self.bytes = collections.Counter()
+        self.connections = 0
+        self.writes = 0
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), _Handler)
+        self.server.daemon_threads = True
+        self.server.fake = self
+        self.thread = None
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{}'.format(self.server.server_port)
+
+    @property
+    def keystone_url(self):
+        return self.url + '/v3'
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def reset_counters(self):
+        with self.lock:
+            self.calls.clear()
+            self.bytes.clear()
+            self.connections = 0
+            self.writes = 0
+
+    def collection(self, project, path):
+        """ Return the ordered dict of id to element of a collection of a project
+        """
+        with self.lock:
+            project_collections = self.projects.setdefault(project, dict(
+                (name, _Collection()) for name in COLLECTIONS.values()))
+        return project_collections[COLLECTIONS[path]]
+
+    def seed(self, project, path, elements):
+        """ Add elements to a collection of a project directly, without counting requests
+        """
+        collection = self.collection(project, path)
+        for element in elements:
+            created = self._new_element(path, element)
+            collection[created['id']] = created
+
+    @staticmethod
+    def _new_element(path, body):
+        now = time.time()
+        element = dict(body, id=uuid.uuid4().hex, created_at=now, updated_at=now)
+        if path == 'alarm-definitions':
+            element.setdefault('description', '')
+            element['match_by'] = element.get('match_by') or []
+            element['severity'] = element.get('severity') or 'LOW'
+            for action in DEFINITION_ACTIONS:
+                element[action] = element.get(action) or []
+        return element
+
+    def issue_token(self, body, base):
+        """ Return the response body and token for a Keystone v3 token request
+        """
+        auth = body.get('auth', {})
+        scope = auth.get('scope', {}).get('project', {})
+        project = scope.get('name') or scope.get('id') or 'admin'
+        token = uuid.uuid4().hex
+        with self.lock:
+            self.tokens[token] = project
+        catalog = [{'type': 'monitoring', 'name': 'monasca', 'id': 'monasca', 'endpoints': [
+            {'id': '{}-{}'.format(region, interface), 'interface': interface, 'region': region, 'region_id': region,
+             'url': base + '/v2.0' if self.versioned_catalog else base}
+            for region in self.regions for interface in ('admin', 'internal', 'public')]}]
+        domain = {'id': 'default', 'name': 'Default'}
+        return {'token': {
+            'methods': auth.get('identity', {}).get('methods', ['password']),
+            'expires_at': '2099-01-01T00:00:00.000000Z',
+            'issued_at': '2020-01-01T00:00:00.000000Z',
+            'project': {'id': project, 'name': project, 'domain': domain},
+            'user': {'id': 'user', 'name': 'user', 'domain': domain},
+            'catalog': catalog,
+        }}, token
+
+    def throttle(self):
+        """ Return whether to throttle the next write
+        """
+        with self.lock:
+            self.writes += 1
+            return self.throttle_every > 0 and self.writes % self.throttle_every == 0
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately, which Nagle's algorithm would delay until the client acknowledges
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        with self.server.fake.lock:
+            self.server.fake.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def do_PATCH(self):
+        self._handle('PATCH')
+
+    def do_PUT(self):
+        self._handle('PUT')
+
+    def do_DELETE(self):
+        self._handle('DELETE')
+
+    def _send(self, status, body=None, headers=None):
+        data = json.dumps(body).encode('utf-8') if body is not None else b''
+        compress = self.server.fake.compress and len(data) >= COMPRESS_MIN_BYTES and \
+            'gzip' in self.headers.get('Accept-Encoding', '')
+        if compress:
+            data = gzip.compress(data, 6)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        if compress:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+        self._count_bytes(len(data))
+
+    def _read(self):
+        """ Read the request body, before any response so that a connection kept alive is left at the next request
+        """
+        length = int(self.headers.get('Content-Length') or 0)
+        self.data = self.rfile.read(length) if length else b''
+        self._count_bytes(length)
+
+    def _body(self):
+        return json.loads(self.data.decode('utf-8')) if self.data else {}
+
+    def _count_bytes(self, length):
+        with self.server.fake.lock:
+            self.server.fake.bytes[self.call] += length
+
+    def _handle(self, method):
+        fake = self.server.fake
+        url = urlparse(self.path)
+        parts = [part for part in url.path.split('/') if part]
+        query = dict((name, values[0]) for name, values in parse_qs(url.query).items())
+        base = 'http://{}'.format(self.headers.get('Host'))
+
+        if len(parts) > 2 and parts[0] == 'v2.0':
+            resource = parts[1] + '/{id}'
+        else:
+            resource = '/'.join(parts[1:]) or '/'.join(parts)
+        self.call = '{} {}'.format(method, resource)
+        self._read()
+        with fake.lock:
+            fake.calls[self.call] += 1
+        if fake.latency:
+            time.sleep(fake.latency)
+
+        if parts == ['v3'] and method == 'GET':
+            return self._send(200, {'version': {'id': 'v3.14', 'status': 'stable', 'links': [
+                {'rel': 'self', 'href': base + '/v3/'}]}})
+        if parts == ['v3', 'auth', 'tokens'] and method == 'POST':
+            body, token = fake.issue_token(self._body(), base)
+            return self._send(201, body, {'X-Subject-Token': token})
+        if not parts and method == 'GET':
+            return self._send(200, {'versions': [{'id': 'v2.0', 'status': 'CURRENT', 'links': [
+                {'rel': 'self', 'href': base + '/v2.0'}]}]})
+        if parts == ['v2.0'] and method == 'GET':
+            return self._send(200, {'id': 'v2.0', 'status': 'CURRENT', 'links': [
+                {'rel': 'self', 'href': base + '/v2.0'}]})
+        if len(parts) < 2 or parts[0] != 'v2.0' or parts[1] not in COLLECTIONS:
+            return self._send(404, {'title': 'Not Found'})
+
+        with fake.lock:
+            project = fake.tokens.get(self.headers.get('X-Auth-Token'))
+        if project is None:
+            return self._send(401, {'title': 'Unauthorized'})
+        if method != 'GET' and fake.throttle():
+            self._body()
+            return self._send(429, {'title': 'Too Many Requests'}, {'Retry-After': '0'})
+
+        path = parts[1]
+        collection = fake.collection(project, path)
+        if len(parts) == 2:
+            if method == 'GET':
+                return self._list(collection, path, query, base + url.path)
+            if method == 'POST':
+                body = self._body()
+                if collection.names[body.get('name')] > 0:
+                    return self._send(409, {'title': 'Conflict', 'description': 'Name already exists'})
+                element = fake._new_element(path, body)
+                collection[element['id']] = element
+                return self._send(201, _public(element))
+            return self._send(405, {'title': 'Method Not Allowed'})
+
+        element = collection.get(parts[2])
+        if element is None:
+            return self._send(404, {'title': 'Not Found'})
+        if method == 'GET':
+            return self._send(200, _public(element))
+        if method == 'DELETE':
+            del collection[parts[2]]
+            return self._send(204)
+        if method in ('PATCH', 'PUT'):
+            body = self._body()
+            if path == 'alarm-definitions' and body.get('match_by') is not None and \
+                    sorted(body['match_by']) != sorted(element['match_by']):
+                return self._send(422, {'title': 'Unprocessable Entity', 'description': 'match_by must not change'})
+            element = dict(element, updated_at=time.time())
+            element.update((name, value) for name, value in body.items() if value is not None)
+            collection[parts[2]] = element
+            return self._send(200, _public(element))
+        return self._send(405, {'title': 'Method Not Allowed'})
+
+    def _list(self, collection, path, query, self_url):
+        """ Send a page of a collection, filtered by name for alarm definitions and sorted by the sort_by fields as
+            in the Monasca API
+        """
+        fake = self.server.fake
+        elements = list(collection.values())
+        if 'name' in query and path == 'alarm-definitions':
+            elements = [element for element in elements if element['name'] == query['name']]
+        for field in reversed(query.get('sort_by', '').split(',') if query.get('sort_by') else []):
+            name, _, order = field.strip().partition(' ')
+            if name not in ('id', 'name', 'created_at', 'updated_at') or order not in ('', 'asc', 'desc'):
+                return self._send(400, {'title': 'Bad Request', 'description': 'Invalid sort_by {}'.format(field)})
+            elements.sort(key=lambda element: element[name], reverse=order == 'desc')
+        offset = int(query.get('offset', 0))
+        limit = min(int(query.get('limit', fake.page_size)), fake.page_size)
+        links = [{'rel': 'self', 'href': self_url}]
+        if offset + limit < len(elements):
+            next_query = dict(query, offset=offset + limit, limit=limit)
+            links.append({'rel': 'next', 'href': self_url + '?' + urlencode(next_query)})
+        self._send(200, {'links': links, 'elements': [_public(element) for element in elements[offset:offset + limit]]})
+
+
+def _public(element):
+    return dict((name, value) for name, value in element.items() if name not in TIMESTAMPS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--throttle-every', type=int, default=0)
+    parser.add_argument('--page-size', type=int, default=10000)
+    parser.add_argument('--compress', action='store_true')
+    args = parser.parse_args()
+
+    fake = FakeMonasca(args.port, args.latency, args.throttle_every, args.page_size, compress=args.compress)
+    print('Keystone URL: {}'.format(fake.keystone_url))
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
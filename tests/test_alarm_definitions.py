@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+
+# (C) Copyright 2020 StackHPC Ltd.
+
+""" Tests of monasca_alarm_definitions and monasca_alarm_definition against the fake API
+
+    Run with: python -m pytest tests
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import argparse
+
+import pytest
+
+import benchmark
+from fake_monasca import FakeMonasca
+
+LIBRARY = benchmark._library()
+PROJECT = 'definitions'
+
+
+@pytest.fixture
+def fake():
+    fake = FakeMonasca().start()
+    yield fake
+    fake.stop()
+
+
+@pytest.fixture(params=['requests', 'monascaclient'])
+def bench(request, fake):
+    return benchmark.Benchmark(fake, argparse.Namespace(max_workers=4, page_size=None, http_client=request.param,
+                                                        http_pool_size=None))
+
+
+def _params(bench, definitions, **params):
+    result = dict(alarm_definitions=definitions, alarm_definition_templates=None, alarm_actions=[], ok_actions=[],
+                  undetermined_actions=[], prune=False, prune_prefix='', replace_on_match_by_change=False)
+    result.update(params)
+    return bench.params(PROJECT, **result)
+
+
+def _run(params, check_mode=False, module='monasca_alarm_definitions', cls='MonascaDefinitions'):
+    ansible_module = benchmark._BenchModule(params)
+    ansible_module.check_mode = check_mode
+    try:
+        getattr(LIBRARY[module], cls)(ansible_module).run()
+    except benchmark._Exit as e:
+        return e.result
+    raise AssertionError('Module did not exit')
+
+
+def _live(fake, project=PROJECT):
+    return dict((element['name'], element) for element in fake.collection(project, 'alarm-definitions').values())
+
+
+def _match_by(definition):
+    return dict(definition, match_by=['hostname', 'device'])
+
+
+@pytest.mark.parametrize('check_mode', [True, False])
+def test_match_by_change_fails(fake, bench, check_mode):
+    fake.seed(PROJECT, 'alarm-definitions', [benchmark._definition(index) for index in range(2)])
+    ids = dict((name, element['id']) for name, element in _live(fake).items())
+    desired = [_match_by(benchmark._definition(0)), benchmark._definition(1, 80)]
+
+    result = _run(_params(bench, desired), check_mode)
+    assert result['failed']
+    assert list(result['failures']) == ['bench-00000']
+    assert 'replace_on_match_by_change' in result['failures']['bench-00000']
+    assert result['replaced'] == []
+    assert result['updated'] == ['bench-00001']
+    assert dict((name, element['id']) for name, element in _live(fake).items()) == ids
+    assert _live(fake)['bench-00000']['match_by'] == ['hostname']
+
+
+@pytest.mark.parametrize('check_mode', [True, False])
+def test_match_by_change_replaces(fake, bench, check_mode):
+    fake.seed(PROJECT, 'alarm-definitions', [benchmark._definition(0)])
+    old_id = _live(fake)['bench-00000']['id']
+
+    result = _run(_params(bench, [_match_by(benchmark._definition(0))], replace_on_match_by_change=True), check_mode)
+    assert not result.get('failed'), result.get('msg')
+    assert result['changed']
+    assert result['replaced'] == ['bench-00000']
+    live = _live(fake)['bench-00000']
+    if check_mode:
+        assert live['id'] == old_id
+    else:
+        assert live['id'] != old_id and sorted(live['match_by']) == ['device', 'hostname']
+        assert result['alarm_definition_ids'] == {'bench-00000': live['id']}
+
+
+@pytest.mark.parametrize('replace', [True, False])
+def test_match_by_change_single(fake, bench, replace):
+    fake.seed(PROJECT, 'alarm-definitions', [benchmark._definition(0)])
+    old_id = _live(fake)['bench-00000']['id']
+    params = bench.params(PROJECT, replace_on_match_by_change=replace, **_match_by(benchmark._definition(0)))
+
+    result = _run(params, module='monasca_alarm_definition', cls='MonascaDefinition')
+    live = _live(fake)['bench-00000']
+    if replace:
+        assert result['changed'] and result['alarm_definition_id'] == live['id'] != old_id
+    else:
+        assert result['failed'] and 'replace_on_match_by_change' in result['msg']
+        assert live['id'] == old_id and live['match_by'] == ['hostname']
+
+
+@pytest.mark.parametrize('check_mode', [True, False])
+def test_prune(fake, bench, check_mode):
+    fake.seed(PROJECT, 'alarm-definitions', [benchmark._definition(index) for index in range(4)] +
+              [dict(benchmark._definition(0), name='other-00000')])
+    desired = [benchmark._definition(0), benchmark._definition(1, 80)]
+
+    result = _run(_params(bench, desired, prune=True, prune_prefix='bench-'), check_mode)
+    assert not result.get('failed'), result.get('msg')
+    assert result['changed']
+    assert result['updated'] == ['bench-00001']
+    assert sorted(result['deleted']) == ['bench-00002', 'bench-00003']
+    live = _live(fake)
+    if check_mode:
+        assert len(live) == 5
+    else:
+        assert sorted(live) == ['bench-00000', 'bench-00001', 'other-00000']
+        assert sorted(result['alarm_definition_ids']) == ['bench-00000', 'bench-00001']
+        assert not _run(_params(bench, desired, prune=True, prune_prefix='bench-'))['changed']
+
+
+def test_prune_disabled(fake, bench):
+    fake.seed(PROJECT, 'alarm-definitions', [benchmark._definition(index) for index in range(3)])
+    result = _run(_params(bench, [benchmark._definition(0)], prune_prefix='bench-'))
+    assert not result['changed'] and result['deleted'] == []
+    assert len(_live(fake)) == 3
+
+
+def test_targets_one_fails(fake, bench):
+    fake.seed('target-b', 'alarm-definitions', [benchmark._definition(0)])
+    targets = [{'keystone_project': 'target-a', 'monasca_endpoint_region': None, 'monasca_api_url': None},
+               {'keystone_project': 'target-b', 'monasca_endpoint_region': 'RegionTwo', 'monasca_api_url': None}]
+    params = _params(bench, [benchmark._definition(0, 80)], targets=targets, monasca_endpoint_region='RegionOne')
+
+    result = _run(params)
+    assert result['failed']
+    assert result['msg'] == 'Failed to apply to 1 of 2 targets: target-b/RegionTwo'
+    # The failed target does not stop the other
+    assert result['changed']
+    assert result['targets']['target-a/RegionOne']['created'] == ['bench-00000']
+    assert result['targets']['target-b/RegionTwo']['failed']
+    assert 'RegionTwo' in result['targets']['target-b/RegionTwo']['msg']
+    assert sorted(_live(fake, 'target-a')) == ['bench-00000']
+    assert _live(fake, 'target-b')['bench-00000']['expression'] == benchmark._definition(0)['expression']
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+# (C) Copyright 2020 StackHPC Ltd.
+
+""" Tests of the monasca_alarm_catalog filter which selects and merges the groups of alarm definitions
+
+    Run with: python -m pytest tests
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import os
+
+import pytest
+
+import benchmark
+
+filters = benchmark._load('monasca_filter_plugins', os.path.join(benchmark.ROLE_DIR, 'filter_plugins', 'monasca.py'))
+
+GROUPS = [
+    {'name': 'system', 'tag': 'system_alarms', 'definitions': [{'name': 'cpu', 'expression': 'cpu > 1'}]},
+    {'name': 'ceph', 'tag': 'ceph_alarms', 'definitions': [
+        {'name': 'ceph', 'expression': 'ceph > 1', 'severity': 'high', 'match_by': ['cluster']}]},
+    {'name': 'custom', 'tag': 'custom_alarms', 'definitions': {}},
+]
+
+
+def _names(skip_tasks=None, run_tags=None, skip_tags=None):
+    catalog = filters.monasca_alarm_catalog(GROUPS, skip_tasks, run_tags, skip_tags, ['alarms'])
+    return [definition['name'] for definition in catalog]
+
+
+@pytest.mark.parametrize('run_tags, names', [
+    (None, ['cpu', 'ceph']),
+    (['all'], ['cpu', 'ceph']),
+    (['alarms'], ['cpu', 'ceph']),
+    (['ceph_alarms'], ['ceph']),
+    (['ceph_alarms', 'venv'], ['ceph']),
+    (['venv'], []),
+    (['custom_alarms'], []),
+])
+def test_run_tags(run_tags, names):
+    assert _names(run_tags=run_tags) == names
+
+
+@pytest.mark.parametrize('run_tags, skip_tags, names', [
+    (None, ['ceph_alarms'], ['cpu']),
+    (['alarms'], ['ceph_alarms', 'system_alarms'], []),
+    (['ceph_alarms'], ['ceph_alarms'], []),
+    (['all'], ['venv'], ['cpu', 'ceph']),
+])
+def test_skip_tags(run_tags, skip_tags, names):
+    assert _names(run_tags=run_tags, skip_tags=skip_tags) == names
+
+
+def test_skip_tasks():
+    assert _names(skip_tasks=['system', 'venv']) == ['ceph']
+    assert _names(skip_tasks=['system'], run_tags=['system_alarms']) == []
+
+
+def test_defaults():
+    cpu, ceph = filters.monasca_alarm_catalog(GROUPS)
+    assert cpu == {'name': 'cpu', 'expression': 'cpu > 1', 'description': '', 'match_by': ['hostname'],
+                   'severity': 'LOW'}
+    assert ceph['severity'] == 'HIGH' and ceph['match_by'] == ['cluster']
+    # The defaults are not shared between definitions or with the groups
+    cpu['match_by'].append('device')
+    assert filters.monasca_alarm_catalog(GROUPS)[0]['match_by'] == ['hostname']
+    assert GROUPS[1]['definitions'][0]['severity'] == 'high'
+
+
+def test_invalid_groups():
+    with pytest.raises(filters.AnsibleFilterError, match='Duplicate alarm definition name'):
+        filters.monasca_alarm_catalog(GROUPS + [{'name': 'other', 'tag': 'other', 'definitions': [{'name': 'cpu'}]}])
+    with pytest.raises(filters.AnsibleFilterError, match='without a name in group other'):
+        filters.monasca_alarm_catalog([{'name': 'other', 'tag': 'other', 'definitions': [{'expression': 'x > 1'}]}])
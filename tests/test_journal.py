@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+
+# (C) Copyright 2020 StackHPC Ltd.
+
+""" Tests of the journal with which monasca_alarm_definitions resumes an interrupted run, against the fake API
+
+    Run with: python -m pytest tests
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import pytest
+
+import benchmark
+from fake_monasca import FakeMonasca
+
+LIBRARY = benchmark._library()
+monasca = sys.modules['ansible.module_utils.monasca']
+PATH = '/alarm-definitions'
+
+
+@pytest.fixture
+def fake():
+    fake = FakeMonasca().start()
+    yield fake
+    fake.stop()
+
+
+@pytest.fixture(params=['requests', 'monascaclient'])
+def bench(request, fake):
+    return benchmark.Benchmark(fake, argparse.Namespace(max_workers=4, page_size=None, http_client=request.param,
+                                                        http_pool_size=None))
+
+
+def _params(bench, cache_dir, definitions, replace_on_match_by_change=False):
+    return bench.params('journal', alarm_definitions=definitions, alarm_definition_templates=None, alarm_actions=[],
+                        ok_actions=[], undetermined_actions=[], prune=False, prune_prefix='', cache_dir=cache_dir,
+                        replace_on_match_by_change=replace_on_match_by_change)
+
+
+def _run(params):
+    try:
+        LIBRARY['monasca_alarm_definitions'].MonascaDefinitions(benchmark._BenchModule(params)).run()
+    except benchmark._Exit as e:
+        return e.result
+    raise AssertionError('Module did not exit')
+
+
+def _live(fake):
+    return dict((element['name'], element) for element in fake.collection('journal', 'alarm-definitions').values())
+
+
+def test_journal_load(tmp_path):
+    journal = monasca._Journal(str(tmp_path / 'journal.jsonl'), 'key')
+    assert journal.load() is None
+
+    plan = [monasca._change('create', 'a', None, 'fa', {'name': 'a'}),
+            monasca._change('update', 'b', 'id-b', 'fb', {'name': 'b'}),
+            monasca._change('delete', 'c', 'id-c', 'fc')]
+    journal.begin({'b': 'id-b'}, plan)
+    journal.append(start='a')
+    journal.append(start='b')
+    journal.append(done='a', id='id-a')
+    with open(journal.path, 'a') as f:
+        f.write('{"start": "c"')  # Interrupted while writing
+    assert journal.load() == ({'b': 'id-b'}, plan, {'a': 'id-a'}, {'b'})
+
+    assert monasca._Journal(journal.path, 'other').load() is None
+    journal.finish()
+    assert not os.path.exists(journal.path)
+    journal.finish()
+
+
+def test_journal_expires(tmp_path):
+    journal = monasca._Journal(str(tmp_path / 'journal.jsonl'), 'key')
+    journal.begin({}, [])
+    with open(journal.path) as f:
+        header = json.loads(f.readline())
+    header['time'] = time.time() - monasca.JOURNAL_MAX_AGE - 1
+    with open(journal.path, 'w') as f:
+        f.write(json.dumps(header) + '\n')
+    assert journal.load() is None
+
+
+def test_resume(fake, bench, tmp_path):
+    fake.seed('journal', 'alarm-definitions', [benchmark._definition(index) for index in range(5)])
+    desired = [benchmark._definition(index, 80) for index in range(7)]
+    params = _params(bench, str(tmp_path), desired)
+
+    # Plan and journal as an interrupted run would: bench-00000 was updated and recorded done, bench-00001 and
+    # bench-00005 were applied but not recorded, and bench-00006 was started but not applied
+    module = LIBRARY['monasca_alarm_definitions'].MonascaDefinitions(benchmark._BenchModule(params))
+    existing, _ = module._snapshot_index(PATH, monasca.definition_fingerprint, live=True)
+    ids, plan = module._plan(existing, desired, monasca.definition_fingerprint, None)
+    journal = module._journal(PATH)
+    journal.begin(ids, plan)
+    changes = dict((change['name'], change) for change in plan)
+    for name in ('bench-00000', 'bench-00001', 'bench-00005', 'bench-00006'):
+        journal.append(start=name)
+    for name in ('bench-00000', 'bench-00001'):
+        module._patch(changes[name]['id'], **changes[name]['kwargs'])
+    created = module._create(**changes['bench-00005']['kwargs'])
+    journal.append(done='bench-00000', id=changes['bench-00000']['id'])
+
+    fake.reset_counters()
+    result = _run(params)
+    assert not result.get('failed'), result.get('msg')
+    assert result['journal_resumed']
+    assert result['changed']
+    # Only the changes started but not done are looked up, by name, rather than listing the collection
+    assert fake.calls['GET alarm-definitions'] == 3
+    assert fake.calls['PATCH alarm-definitions/{id}'] == 3
+    assert fake.calls['POST alarm-definitions'] == 1
+    assert not os.path.exists(journal.path)
+
+    live = _live(fake)
+    assert sorted(live) == sorted(definition['name'] for definition in desired)
+    assert live['bench-00005']['id'] == created
+    assert result['alarm_definition_ids'] == dict((name, element['id']) for name, element in live.items())
+    for definition in desired:
+        assert monasca.definition_fingerprint(live[definition['name']]) == \
+            monasca.definition_fingerprint(definition)
+
+    fake.reset_counters()
+    result = _run(params)
+    assert not result['changed']
+    assert 'journal_resumed' not in result
+    assert fake.calls['PATCH alarm-definitions/{id}'] == fake.calls['POST alarm-definitions'] == 0
+
+
+def test_resume_ignores_other_params(fake, bench, tmp_path):
+    fake.seed('journal', 'alarm-definitions', [benchmark._definition(index) for index in range(3)])
+    params = _params(bench, str(tmp_path), [benchmark._definition(index, 80) for index in range(3)])
+
+    # A journal of a plan to delete everything, made with other params
+    module = LIBRARY['monasca_alarm_definitions'].MonascaDefinitions(benchmark._BenchModule(params))
+    existing, _ = module._snapshot_index(PATH, monasca.definition_fingerprint, live=True)
+    journal = module._journal(PATH)
+    monasca._Journal(journal.path, 'other').begin({}, [
+        monasca._change('delete', name, entry_id, entry_fingerprint)
+        for name, (entry_id, entry_fingerprint) in existing.items()])
+
+    result = _run(params)
+    assert not result.get('failed'), result.get('msg')
+    assert 'journal_resumed' not in result
+    assert sorted(result['updated']) == sorted(existing)
+    assert len(_live(fake)) == 3
+    assert not os.path.exists(journal.path)
+
+
+def test_resume_replace(fake, bench, tmp_path):
+    fake.seed('journal', 'alarm-definitions', [benchmark._definition(index) for index in range(2)])
+    desired = [dict(benchmark._definition(index), match_by=['hostname', 'device']) for index in range(2)]
+    params = _params(bench, str(tmp_path), desired, replace_on_match_by_change=True)
+
+    # Both replaces were started and the old alarm definitions deleted, but only bench-00000 was created again
+    module = LIBRARY['monasca_alarm_definitions'].MonascaDefinitions(benchmark._BenchModule(params))
+    existing, _ = module._snapshot_index(PATH, monasca.definition_fingerprint, live=True)
+    ids, plan = module._plan(existing, desired, monasca.definition_fingerprint, None, monasca.definition_replaced)
+    assert [change['action'] for change in plan] == ['replace', 'replace']
+    journal = module._journal(PATH)
+    journal.begin(ids, plan)
+    for change in plan:
+        journal.append(start=change['name'])
+        module._delete(change['id'])
+    module._create(**plan[0]['kwargs'])
+
+    result = _run(params)
+    assert not result.get('failed'), result.get('msg')
+    assert result['journal_resumed']
+    live = _live(fake)
+    assert sorted(live) == ['bench-00000', 'bench-00001']
+    assert all(sorted(element['match_by']) == ['device', 'hostname'] for element in live.values())
+    assert not os.path.exists(journal.path)
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+
+# (C) Copyright 2020 StackHPC Ltd.
+
+""" Tests of the alarm expression parser and the alarm definition fingerprints which rely on its normalisation
+
+    Run with: python -m pytest tests
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import os
+
+import pytest
+
+import benchmark
+
+# The parser only needs the standard library, unlike the rest of module_utils
+expression = benchmark._load('monasca_expression', os.path.join(benchmark.ROLE_DIR, 'module_utils',
+                                                                'monasca_expression.py'))
+
+
+@pytest.fixture(scope='module')
+def monasca():
+    """ module_utils/monasca.py, which imports the parser from ansible.module_utils
+    """
+    pytest.importorskip('ansible')
+    path = os.path.join(benchmark.ROLE_DIR, 'module_utils')
+    benchmark._load('ansible.module_utils.monasca_expression', os.path.join(path, 'monasca_expression.py'))
+    return benchmark._load('ansible.module_utils.monasca', os.path.join(path, 'monasca.py'))
+
+
+@pytest.mark.parametrize('given, normalised', [
+    ('avg(cpu.idle_perc) < 10', 'avg(cpu.idle_perc) < 10'),
+    ('cpu.idle_perc > 10', 'cpu.idle_perc > 10'),
+    ('AVG(cpu.idle_perc{hostname=h1, service=monitoring}, 120) lt 10 times 3',
+     'avg(cpu.idle_perc{hostname=h1,service=monitoring}, 120) < 10 times 3'),
+    ('cpu.idle_perc{b=2,a=1} gte 1.50', 'cpu.idle_perc{a=1,b=2} >= 1.5'),
+    ('count(log.error, deterministic) > 0', 'count(log.error, deterministic) > 0'),
+    ('last(x,deterministic,300)>=+7', 'last(x, deterministic, 300) >= 7'),
+    ('avg(x, 60) > 5 times 1', 'avg(x) > 5'),
+    ('max(x) LTE 1e3', 'max(x) <= 1000'),
+    ('max(x) > -2.5e-1', 'max(x) > -0.25'),
+    ('a > 1 && b < 2', 'a > 1 and b < 2'),
+    ('a > 1 || b < 2', 'a > 1 or b < 2'),
+    ('a > 1 && b < 2 || c >= 1e3', 'a > 1 and b < 2 or c >= 1000'),
+    ('(a > 1 OR b > 2) AND c > 3', '(a > 1 or b > 2) and c > 3'),
+])
+def test_normalise_valid(given, normalised):
+    assert expression.normalise_expression(given) == normalised
+
+
+@pytest.mark.parametrize('given, error', [
+    ('', 'Empty expression'),
+    ('   ', 'Empty expression'),
+    ('avg(cpu) >', 'Expected a threshold at end of expression'),
+    ('avg(cpu 10', "Expected ')' but found '10'"),
+    ('foo(cpu) > 1', "Expected a comparator but found '('"),
+    ('cpu > abc', "Expected a numeric threshold but found 'abc'"),
+    ('cpu >> 1', "Expected a numeric threshold but found '>'"),
+    ('cpu{a=1,a=2} > 1', "Duplicate dimension 'a'"),
+    ('a > 1 and', 'Expected a metric name at end of expression'),
+    ('(a > 1', "Expected ')' at end of expression"),
+    ('cpu > 1 times', 'Expected a number of periods at end of expression'),
+    ('cpu > 1 times 0', 'Expected a number of periods greater than 0'),
+    ('avg(cpu, 0) > 1', 'Expected a period greater than 0'),
+    ('cpu"x > 1', "Unexpected character '\"'"),
+    ('avg(cpu, deterministic, 60, 5) > 1', "Unexpected '5'"),
+    ('x{a=b > 1', "Expected '}' but found '>' at position 6"),
+    ('cpu{hostname=a b} > 1', "Expected '}' but found 'b' at position 15"),
+])
+def test_normalise_invalid(given, error):
+    with pytest.raises(expression.ExpressionError) as excinfo:
+        expression.normalise_expression(given)
+    assert error in str(excinfo.value)
+
+
+def test_invalid_is_value_error():
+    with pytest.raises(ValueError):
+        expression.normalise_expression('cpu >')
+
+
+def _definition(**fields):
+    definition = {'name': 'cpu', 'description': 'CPU usage', 'expression': 'avg(cpu.idle_perc{hostname=h1}) < 10',
+                  'match_by': ['hostname'], 'severity': 'HIGH', 'alarm_actions': ['a', 'b'], 'ok_actions': [],
+                  'undetermined_actions': []}
+    definition.update(fields)
+    return definition
+
+
+@pytest.mark.parametrize('fields', [
+    {'expression': '  AVG( cpu.idle_perc{ hostname = h1 } )   LT   10.0  '},
+    {'expression': 'avg(cpu.idle_perc{hostname=h1}, 60) < 1e1 times 1'},
+    {'severity': 'high'},
+    {'alarm_actions': ['b', 'a', 'a']},
+    {'match_by': ['hostname', 'hostname']},
+    {'name': 'other'},
+])
+def test_fingerprint_equivalent(monasca, fields):
+    assert monasca.definition_fingerprint(_definition(**fields)) == monasca.definition_fingerprint(_definition())
+
+
+@pytest.mark.parametrize('fields', [
+    {'expression': 'avg(cpu.idle_perc{hostname=h1}) < 20'},
+    {'expression': 'avg(cpu.idle_perc{hostname=h1}) <= 10'},
+    {'expression': 'avg(cpu.idle_perc{hostname=h1}, 120) < 10'},
+    {'expression': 'avg(cpu.idle_perc{hostname=h1}) < 10 times 2'},
+    {'severity': 'LOW'},
+    {'description': 'CPU'},
+    {'ok_actions': ['a']},
+])
+def test_fingerprint_differs(monasca, fields):
+    definition = _definition(**fields)
+    assert monasca.definition_fingerprint(definition) != monasca.definition_fingerprint(_definition())
+    assert not monasca.definition_replaced(monasca.definition_fingerprint(_definition()),
+                                           monasca.definition_fingerprint(definition))
+
+
+def test_fingerprint_operand_order(monasca):
+    first = monasca.definition_fingerprint(_definition(expression='a > 1 and (b < 2 or c > 3)'))
+    second = monasca.definition_fingerprint(_definition(expression='(c gt 3 || b lt 2) && a > 1'))
+    assert first == second
+
+
+def test_fingerprint_match_by(monasca):
+    current = monasca.definition_fingerprint(_definition(match_by=['hostname', 'device']))
+    assert current == monasca.definition_fingerprint(_definition(match_by=['device', 'hostname', 'device']))
+    desired = monasca.definition_fingerprint(_definition(match_by=['hostname']))
+    assert current != desired
+    assert monasca.definition_replaced(current, desired)
+
+
+def test_fingerprint_unparsed_expression(monasca):
+    # Expressions the parser rejects are left to the API, only differences in whitespace are ignored
+    first = monasca.definition_fingerprint(_definition(expression='avg(cpu) >'))
+    assert first == monasca.definition_fingerprint(_definition(expression='  avg(cpu)   > '))
+    assert first != monasca.definition_fingerprint(_definition(expression='avg(cpu) <'))
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+# (C) Copyright 2020 StackHPC Ltd.
+
+""" Tests of the requests based client of http_client=requests against the fake API
+
+    Run with: python -m pytest tests
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import os
+
+import pytest
+
+import benchmark
+from fake_monasca import FakeMonasca
+
+pytest.importorskip('requests')
+monasca_rest = benchmark._load('monasca_rest', os.path.join(benchmark.ROLE_DIR, 'module_utils', 'monasca_rest.py'))
+
+ENDPOINT_FILTER = {'service_type': 'monitoring', 'interface': ['admin', 'internal'], 'region_name': 'RegionOne',
+                   'version': '2.0'}
+
+
+@pytest.fixture(params=[True, False], ids=['versioned', 'unversioned'])
+def fake(request):
+    fake = FakeMonasca(versioned_catalog=request.param).start()
+    yield fake
+    fake.stop()
+
+
+def _session(fake, project='rest'):
+    return monasca_rest.Session(monasca_rest.Password(fake.keystone_url, 'user', 'password', project, 'default',
+                                                      'default'))
+
+
+def test_reauthenticates_on_401(fake):
+    fake.seed('rest', 'alarm-definitions', [{'name': 'cpu', 'expression': 'cpu > 1'}])
+    session = _session(fake)
+    url = session.get('/', endpoint_filter=ENDPOINT_FILTER).url
+    client = monasca_rest.Client('2_0', url, session)
+    assert fake.calls['POST auth/tokens'] == 1
+
+    # The token is revoked, so the next request is rejected once and retried with a new token
+    with fake.lock:
+        fake.tokens.clear()
+    body = client.alarm_definitions.patch(alarm_id=list(fake.collection('rest', 'alarm-definitions'))[0],
+                                          severity='HIGH')
+    assert body['severity'] == 'HIGH'
+    assert fake.calls['POST auth/tokens'] == 2
+    assert fake.calls['PATCH alarm-definitions/{id}'] == 2
+
+
+def test_persistent_401_raises(fake, monkeypatch):
+    session = _session(fake)
+    url = session.get('/', endpoint_filter=ENDPOINT_FILTER).url
+    # Tokens are issued but never accepted
+    monkeypatch.setattr(fake, 'tokens', type('Tokens', (dict,), {'__setitem__': lambda self, key, value: None})())
+
+    client = monasca_rest.Client('2_0', url, monasca_rest.Session(session.auth))
+    session.auth.invalidate()
+    with pytest.raises(monasca_rest.HttpError) as excinfo:
+        client.alarm_definitions.create(name='cpu', expression='cpu > 1')
+    assert excinfo.value.http_status == 401
+    assert fake.calls['POST alarm-definitions'] == 2
+
+
+def test_versioned_endpoint(fake):
+    session = _session(fake)
+    assert session.get('/', endpoint_filter=ENDPOINT_FILTER).url == fake.url + '/v2.0/'
+    assert monasca_rest._versioned(fake.url + '/v2.0', '2.0') == fake.url + '/v2.0'
+    assert monasca_rest._versioned(fake.url + '/', '2.0') == fake.url + '/v2.0'
+    assert monasca_rest._versioned(fake.url, None) == fake.url
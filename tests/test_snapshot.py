@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+# (C) Copyright 2020 StackHPC Ltd.
+
+""" Tests of the snapshot with which runs which change nothing skip listing a collection, against the fake API
+
+    Run with: python -m pytest tests
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import argparse
+import time
+
+import pytest
+
+import benchmark
+from fake_monasca import FakeMonasca
+
+LIBRARY = benchmark._library()
+
+
+@pytest.fixture
+def fake():
+    fake = FakeMonasca().start()
+    yield fake
+    fake.stop()
+
+
+def _run(fake, cache_dir, definitions):
+    bench = benchmark.Benchmark(fake, argparse.Namespace(max_workers=4, page_size=None, http_client='requests',
+                                                         http_pool_size=None))
+    params = bench.params('snapshot', alarm_definitions=definitions, alarm_definition_templates=None,
+                          alarm_actions=[], ok_actions=[], undetermined_actions=[], prune=False, prune_prefix='',
+                          replace_on_match_by_change=False, cache_dir=cache_dir, snapshot_ttl=3600)
+    module = benchmark._BenchModule(params)
+    module.check_mode = True
+    try:
+        LIBRARY['monasca_alarm_definitions'].MonascaDefinitions(module).run()
+    except benchmark._Exit as e:
+        assert not e.result.get('failed'), e.result.get('msg')
+        return e.result
+    raise AssertionError('Module did not exit')
+
+
+@pytest.mark.parametrize('position', [0, -1])
+def test_snapshot_detects_patch(fake, tmp_path, position):
+    definitions = [benchmark._definition(index) for index in range(3)]
+    fake.seed('snapshot', 'alarm-definitions', definitions)
+    assert not _run(fake, str(tmp_path), definitions)['snapshot_hit']
+    result = _run(fake, str(tmp_path), definitions)
+    assert result['snapshot_hit'] and not result['changed']
+
+    # A change made outside of the modules to the most recently updated element, whose id stays the first when
+    # sorted by updated_at, or to another. The API does not return updated_at, so only the fields show the change.
+    collection = fake.collection('snapshot', 'alarm-definitions')
+    element = sorted(collection.values(), key=lambda element: element['updated_at'], reverse=True)[position]
+    collection[element['id']] = dict(element, severity='HIGH', updated_at=time.time())
+    result = _run(fake, str(tmp_path), definitions)
+    assert not result['snapshot_hit']
+    assert result['updated'] == [element['name']]
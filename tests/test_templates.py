@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+# (C) Copyright 2020 StackHPC Ltd.
+
+""" Tests of the expansion of alarm definition templates and of monasca_alarm_definitions applying them
+
+    Run with: python -m pytest tests
+"""
+
+from __future__ import absolute_import, division, print_function
+
+import argparse
+import sys
+
+import pytest
+
+import benchmark
+from fake_monasca import FakeMonasca
+
+LIBRARY = benchmark._library()
+monasca = sys.modules['ansible.module_utils.monasca']
+
+
+def _template(**fields):
+    template = {'name': 'Disk usage $device on $$host', 'description': 'Usage of ${device}',
+                'expression': 'disk.space_used_perc{device=$device} > $threshold', 'match_by': ['hostname', '$label'],
+                'severity': 'HIGH', 'alarm_actions': ['a'], 'ok_actions': [], 'undetermined_actions': [],
+                'matrix': {'device': ['sda', 'sdb'], 'threshold': [80, 90], 'label': 'device'}}
+    template.update(fields)
+    return template
+
+
+def test_dict_matrix():
+    definitions = list(monasca.expand_template(_template()))
+    assert [(definition['name'], definition['expression']) for definition in definitions] == [
+        ('Disk usage sda on $host', 'disk.space_used_perc{device=sda} > 80'),
+        ('Disk usage sda on $host', 'disk.space_used_perc{device=sda} > 90'),
+        ('Disk usage sdb on $host', 'disk.space_used_perc{device=sdb} > 80'),
+        ('Disk usage sdb on $host', 'disk.space_used_perc{device=sdb} > 90'),
+    ]
+    assert definitions[0] == {'name': 'Disk usage sda on $host', 'description': 'Usage of sda',
+                              'expression': 'disk.space_used_perc{device=sda} > 80', 'match_by': ['hostname', 'device'],
+                              'severity': 'HIGH', 'alarm_actions': ['a'], 'ok_actions': [], 'undetermined_actions': []}
+
+
+def test_list_matrix():
+    matrix = [{'device': 'sda', 'threshold': 80, 'label': 'device'}, {'device': 'nvme0', 'threshold': 95, 'label': 'x'}]
+    definitions = list(monasca.expand_template(_template(matrix=matrix)))
+    assert [(definition['name'], definition['expression'], definition['match_by']) for definition in definitions] == [
+        ('Disk usage sda on $host', 'disk.space_used_perc{device=sda} > 80', ['hostname', 'device']),
+        ('Disk usage nvme0 on $host', 'disk.space_used_perc{device=nvme0} > 95', ['hostname', 'x']),
+    ]
+
+
+def test_missing_param():
+    with pytest.raises(KeyError) as excinfo:
+        list(monasca.expand_template(_template(matrix={'device': ['sda']})))
+    assert excinfo.value.args[0] in ('threshold', 'label')
+
+
+@pytest.fixture
+def fake():
+    fake = FakeMonasca().start()
+    yield fake
+    fake.stop()
+
+
+def test_module_missing_param(fake):
+    bench = benchmark.Benchmark(fake, argparse.Namespace(max_workers=4, page_size=None, http_client='requests',
+                                                         http_pool_size=None))
+    template = _template(name='Disk usage $device', alarm_actions=[], matrix=[{'device': 'sda', 'label': 'device'}])
+    params = bench.params('templates', alarm_definitions=None, alarm_definition_templates=[template],
+                          alarm_actions=[], ok_actions=[], undetermined_actions=[], prune=False, prune_prefix='',
+                          replace_on_match_by_change=False)
+    with pytest.raises(benchmark._Exit) as excinfo:
+        LIBRARY['monasca_alarm_definitions'].MonascaDefinitions(benchmark._BenchModule(params)).run()
+    assert excinfo.value.result['failed']
+    assert excinfo.value.result['msg'] == "Invalid param 'threshold' in alarm definition template Disk usage $device"
+    assert not fake.collection('templates', 'alarm-definitions')